@@ -4,6 +4,10 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
+import json
+import time
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -30,7 +34,9 @@ class MiamiRealEstateAnalyzer:
                 "prix_m2_base": 8500,
                 "segment_immobilier": "luxury_condo",
                 "currency": "USD",
-                "key_features": ["skyline", "waterfront", "international_buyers"]
+                "key_features": ["skyline", "waterfront", "international_buyers"],
+                "condo_share": 0.8,
+                "beachfront_share": 0.1
             },
             "Miami Beach": {
                 "population_base": 92000,
@@ -40,7 +46,9 @@ class MiamiRealEstateAnalyzer:
                 "prix_m2_base": 11000,
                 "segment_immobilier": "premium_beachfront",
                 "currency": "USD",
-                "key_features": ["beachfront", "nightlife", "art_deco_architecture"]
+                "key_features": ["beachfront", "nightlife", "art_deco_architecture"],
+                "condo_share": 0.7,
+                "beachfront_share": 0.35
             },
             "Brickell": {
                 "population_base": 35000,
@@ -50,7 +58,9 @@ class MiamiRealEstateAnalyzer:
                 "prix_m2_base": 9500,
                 "segment_immobilier": "financial_luxury",
                 "currency": "USD",
-                "key_features": ["financial_center", "high_rises", "young_professionals"]
+                "key_features": ["financial_center", "high_rises", "young_professionals"],
+                "condo_share": 0.9,
+                "beachfront_share": 0.08
             },
             "Coral Gables": {
                 "population_base": 50000,
@@ -60,7 +70,9 @@ class MiamiRealEstateAnalyzer:
                 "prix_m2_base": 7500,
                 "segment_immobilier": "premium_suburban",
                 "currency": "USD",
-                "key_features": ["historic", "tree_canopy", "upscale_residential"]
+                "key_features": ["historic", "tree_canopy", "upscale_residential"],
+                "condo_share": 0.25,
+                "beachfront_share": 0.05
             },
             "Fort Lauderdale": {
                 "population_base": 180000,
@@ -70,7 +82,9 @@ class MiamiRealEstateAnalyzer:
                 "prix_m2_base": 6000,
                 "segment_immobilier": "marine_lifestyle",
                 "currency": "USD",
-                "key_features": ["yachting_capital", "beaches", "waterways"]
+                "key_features": ["yachting_capital", "beaches", "waterways"],
+                "condo_share": 0.45,
+                "beachfront_share": 0.2
             },
             "West Palm Beach": {
                 "population_base": 110000,
@@ -80,7 +94,9 @@ class MiamiRealEstateAnalyzer:
                 "prix_m2_base": 5500,
                 "segment_immobilier": "affluent_retirement",
                 "currency": "USD",
-                "key_features": ["golf_communities", "cultural_venues", "affluent_retirees"]
+                "key_features": ["golf_communities", "cultural_venues", "affluent_retirees"],
+                "condo_share": 0.4,
+                "beachfront_share": 0.12
             },
             "South Florida Region": {
                 "population_base": 6000000,
@@ -90,7 +106,9 @@ class MiamiRealEstateAnalyzer:
                 "prix_m2_base": 5000,
                 "segment_immobilier": "mixed_tropical",
                 "currency": "USD",
-                "key_features": ["tropical_climate", "international_hub", "retirement_destination"]
+                "key_features": ["tropical_climate", "international_hub", "retirement_destination"],
+                "condo_share": 0.35,
+                "beachfront_share": 0.08
             },
             # Configuration par défaut
             "default": {
@@ -101,13 +119,15 @@ class MiamiRealEstateAnalyzer:
                 "prix_m2_base": 4500,
                 "segment_immobilier": "coastal_mixed",
                 "currency": "USD",
-                "key_features": ["beach_access", "tourist_destination"]
+                "key_features": ["beach_access", "tourist_destination"],
+                "condo_share": 0.35,
+                "beachfront_share": 0.1
             }
         }
         
         return configs.get(self.area, configs["default"])
     
-    def generate_financial_data(self):
+    def generate_financial_data(self, compact=False):
         """Génère des données financières et immobilières pour la zone de Miami/Floride"""
         print(f"🌴 Génération des données financières et immobilières pour {self.area}, Floride...")
         
@@ -164,8 +184,183 @@ class MiamiRealEstateAnalyzer:
         # Ajouter des tendances spécifiques au marché floridien
         self._add_florida_trends(df)
         
+        # Primes d'assurance habitation (dépendent des prix après tendances)
+        df['Insurance_Costs'] = self._simulate_insurance_costs(dates, df['Median_Home_Price'].to_numpy(),
+                                                               df['Median_Income'].to_numpy())
+        
+        if compact:
+            df = compact_frame(df)
+        
         return df
-    
+
+    def generate_ensemble(self, n_paths=1, seed=None, compact=False, hurricanes=None, scenario=None):
+        """Génère un ensemble de trajectoires vectorisé (tableaux trajectoires × années)
+
+        scenario : MiamiScenario (référence par défaut) ou liste de scénarios évalués en un seul lot ;
+        les tableaux ont alors la forme (scénarios, trajectoires, années), avec le même bruit par scénario.
+        """
+        rng = np.random.RandomState(seed) if seed is not None else np.random
+        years = np.arange(self.start_year, self.end_year + 1)
+        i = np.arange(len(years), dtype=float)
+        shape = (n_paths, len(years))
+        config = self.config
+
+        # Saisons cycloniques stochastiques (sinon ouragans historiques codés en dur)
+        storms = hurricanes.sample_seasons(n_paths, years, rng) if hurricanes is not None else None
+
+        # Chronologie de régimes et chocs compilés une fois en tableaux annuels
+        batched = isinstance(scenario, (list, tuple))
+        if batched:
+            timeline = MiamiScenario.compile_batch(scenario, years, historical_hurricanes=storms is None,
+                                                   specialties=config["specialites"])
+        else:
+            timeline = (scenario or MiamiScenario()).compile(years, historical_hurricanes=storms is None,
+                                                             specialties=config["specialites"])
+        curves = timeline["curves"]
+
+        def noise(scale, loc=1.0):
+            # Même ordre de tirage que les boucles annuelles (métrique par métrique)
+            return rng.normal(loc, scale, size=shape)
+
+        def per_path(values):
+            return np.repeat(np.asarray(values, dtype=float)[np.newaxis, :], n_paths, axis=0)
+
+        data = {'Year': years}
+
+        # Données démographiques
+        if config["type"] in ["urban_core", "coastal_luxury"]:
+            growth_rate = 0.018
+        elif config["type"] == "financial_district":
+            growth_rate = 0.022
+        else:
+            growth_rate = 0.015
+        data['Population'] = per_path(config["population_base"] * (1 + growth_rate * i))
+        data['Households'] = per_path(config["population_base"] / 2.2 * (1 + 0.016 * i))
+
+        if config["type"] in ["financial_district", "coastal_luxury"]:
+            base_income = 85000
+        elif config["type"] == "urban_core":
+            base_income = 65000
+        else:
+            base_income = 55000
+        growth = curves['Median_Income']
+        data['Median_Income'] = base_income * growth * noise(0.06)
+
+        multiplier = curves['International_Buyers_Percentage']
+        data['International_Buyers_Percentage'] = np.clip(25.0 * multiplier * noise(0.08), 10.0, 60.0)
+
+        # Recettes municipales (en millions de dollars)
+        budget_base = config["budget_base"]
+        growth_rate = 0.050 if config["type"] in ["urban_core", "financial_district"] else 0.042
+        data['Total_Revenue'] = budget_base * (1 + growth_rate * i) * noise(0.09)
+        data['Property_Tax_Revenue'] = budget_base * 0.40 * (1 + 0.038 * i) * noise(0.07)
+
+        multiplier = 2.0 if "tourisme" in config["specialites"] else 0.8
+        year_multiplier = curves['Tourism_Tax_Revenue']
+        data['Tourism_Tax_Revenue'] = (budget_base * 0.25 * (1 + 0.045 * i) * year_multiplier
+                                       * multiplier * noise(0.15))
+        data['Sales_Tax_Revenue'] = budget_base * 0.20 * (1 + 0.040 * i) * noise(0.08)
+        data['Other_Revenue'] = budget_base * 0.15 * (1 + 0.035 * i) * noise(0.10)
+
+        # Dépenses municipales
+        data['Total_Expenses'] = budget_base * 0.95 * (1 + 0.044 * i) * noise(0.08)
+        if storms is None:
+            year_multiplier = curves['Infrastructure_Expenses']
+        else:
+            year_multiplier = hurricanes.reconstruction_multiplier(storms['Hurricane_Max_Category'])
+        data['Infrastructure_Expenses'] = budget_base * 0.30 * (1 + 0.042 * i) * year_multiplier * noise(0.16)
+        data['Public_Safety_Expenses'] = budget_base * 0.25 * (1 + 0.038 * i) * noise(0.06)
+        multiplier = 1.8 if "plage" in config["specialites"] else 0.5
+        if storms is None:
+            year_multiplier = curves['Beach_Maintenance_Expenses']
+        else:
+            year_multiplier = hurricanes.impact('Beach_Maintenance_Expenses', storms['Hurricane_Max_Category'])
+        data['Beach_Maintenance_Expenses'] = (budget_base * 0.08 * (1 + 0.040 * i) * year_multiplier
+                                              * multiplier * noise(0.20))
+        acceleration = curves['Climate_Resilience_Expenses']
+        data['Climate_Resilience_Expenses'] = budget_base * 0.12 * (1 + 0.050 * i) * acceleration * noise(0.18)
+
+        # Indicateurs financiers
+        improvement = curves['Budget_Balance']
+        data['Budget_Balance'] = budget_base * 0.05 * improvement * noise(0.22)
+        reduction = curves['Municipal_Debt']
+        data['Municipal_Debt'] = budget_base * 0.65 * reduction * noise(0.11)
+        improvement = curves['Debt_Ratio']
+        data['Debt_Ratio'] = 0.60 * improvement * noise(0.09)
+
+        # Données immobilières (spécifiques à Miami/Floride)
+        base_price = config["prix_m2_base"] * 180
+        growth_rate = {"luxury_condo": 0.068, "premium_beachfront": 0.072,
+                       "financial_luxury": 0.065}.get(config["segment_immobilier"], 0.055)
+        multiplier = curves['Median_Home_Price']
+        data['Median_Home_Price'] = base_price * (1 + growth_rate * i) * multiplier * noise(0.16)
+        # Le prix au pied carré réutilise la dynamique du prix médian sans la croissance tendancielle
+        data['Price_per_Sqft'] = base_price * 1.0 * multiplier * noise(0.16) / (180 * 10.764)
+
+        multiplier = curves['Condo_Price_per_Sqft']
+        data['Condo_Price_per_Sqft'] = (config["prix_m2_base"] / 10.764 * 1.2 * (1 + 0.070 * i)
+                                        * multiplier * noise(0.18))
+
+        multiplier = curves['Home_Sales_Volume']
+        data['Home_Sales_Volume'] = config["population_base"] / 100 * (1 + 0.014 * i) * multiplier * noise(0.20)
+
+        multiplier = curves['New_Construction_Permits']
+        data['New_Construction_Permits'] = (config["population_base"] / 500 * (1 + 0.020 * i)
+                                            * multiplier * noise(0.28))
+
+        rate = curves['Rental_Vacancy_Rate']
+        data['Rental_Vacancy_Rate'] = np.maximum(2.0, rate + noise(0.4, loc=0.0))
+
+        growth = curves['Average_Rent']
+        data['Average_Rent'] = config["prix_m2_base"] / 40 * growth * noise(0.09)
+
+        premium = curves['Beachfront_Premium']
+        data['Beachfront_Premium'] = np.maximum(30.0, premium + noise(3, loc=0.0))
+
+        # Investissements spécifiques adaptés à Miami/Floride
+        multiplier = 1.8 if "condos" in config["specialites"] else 1.0
+        year_multiplier = curves['Real_Estate_Development']
+        data['Real_Estate_Development'] = (budget_base * 0.15 * (1 + 0.055 * i) * year_multiplier
+                                           * multiplier * noise(0.22))
+        multiplier = 2.2 if "tourisme" in config["specialites"] else 0.7
+        year_multiplier = curves['Tourism_Infrastructure_Investment']
+        data['Tourism_Infrastructure_Investment'] = (budget_base * 0.12 * (1 + 0.048 * i) * year_multiplier
+                                                     * multiplier * noise(0.19))
+        acceleration = curves['Climate_Adaptation_Investment']
+        data['Climate_Adaptation_Investment'] = budget_base * 0.10 * (1 + 0.060 * i) * acceleration * noise(0.25)
+        multiplier = 2.5 if "luxe" in config["specialites"] else 0.5
+        year_multiplier = curves['Luxury_Development_Investment']
+        data['Luxury_Development_Investment'] = (budget_base * 0.08 * (1 + 0.065 * i) * year_multiplier
+                                                 * multiplier * noise(0.23))
+        multiplier = 1.7 if "marina" in config["specialites"] else 0.6
+        year_multiplier = curves['Marina_Waterfront_Investment']
+        data['Marina_Waterfront_Investment'] = (budget_base * 0.06 * (1 + 0.042 * i) * year_multiplier
+                                                * multiplier * noise(0.20))
+
+        self._add_florida_trends_vectorized(data, timeline, storms, hurricanes)
+
+        # Primes d'assurance habitation, exposées aux saisons cycloniques historiques ou simulées
+        insurance = MiamiInsuranceModel()
+        if storms is None:
+            categories = insurance.historical_categories(years)[np.newaxis, :]
+        else:
+            categories = storms['Hurricane_Max_Category']
+        data['Insurance_Costs'] = insurance.premiums(years, data['Median_Home_Price'], data['Median_Income'],
+                                                     categories, config["beachfront_share"], noise(0.10))
+        if storms is not None:
+            data.update(storms)
+
+        if batched:
+            # Toutes les métriques portent l'axe des scénarios
+            batch_shape = (len(scenario),) + shape
+            data = {column: values if column == 'Year' else np.ascontiguousarray(np.broadcast_to(values, batch_shape))
+                    for column, values in data.items()}
+
+        if compact:
+            data = {column: to_compact(values, column) for column, values in data.items()}
+
+        return data
+
     def _simulate_population(self, dates):
         """Simule la population de la zone"""
         base_population = self.config["population_base"]
@@ -768,6 +963,27 @@ class MiamiRealEstateAnalyzer:
         
         return investment
     
+    def _simulate_insurance_costs(self, dates, median_prices, median_incomes):
+        """Simule la prime annuelle d'assurance habitation pour le bien médian"""
+        model = MiamiInsuranceModel()
+        beachfront_load = float(model.beachfront_load(self.config["beachfront_share"]))
+        
+        costs = []
+        exposure = 0.0
+        for i, date in enumerate(dates):
+            year = date.year
+            # Exposition cyclonique : ouragans historiques avec amortissement d'une année sur l'autre
+            category = model.HISTORICAL_HURRICANES.get(year, 0)
+            exposure = exposure * model.EXPOSURE_DECAY + model.SEVERITY[category]
+            
+            burden = float(model.income_burden(year))
+            price_factor = np.sqrt(median_prices[i] / median_incomes[i] / model.REFERENCE_PRICE_TO_INCOME)
+            hurricane_load = 1 + model.HURRICANE_LOAD * exposure
+            noise = np.random.normal(1, model.NOISE)
+            costs.append(median_incomes[i] * burden * price_factor * hurricane_load * beachfront_load * noise)
+        
+        return costs
+    
     def _add_florida_trends(self, df):
         """Ajoute des tendances réalistes adaptées au marché floridien"""
         for i, row in df.iterrows():
@@ -792,7 +1008,6 @@ class MiamiRealEstateAnalyzer:
             # Ouragan Irma (2017)
             if year == 2017:
                 df.loc[i, 'Climate_Adaptation_Investment'] *= 2.2
-                df.loc[i, 'Insurance_Costs'] = df.loc[i, 'Median_Home_Price'] * 0.02  # Coût assurance
             
             # COVID-19 et exode vers la Floride (2020-2021)
             if 2020 <= year <= 2021:
@@ -813,8 +1028,22 @@ class MiamiRealEstateAnalyzer:
             if year >= 2010 and "croisières" in self.config["specialites"]:
                 df.loc[i, 'Tourism_Infrastructure_Investment'] *= 1.4
                 df.loc[i, 'Tourism_Tax_Revenue'] *= 1.3
-    
-    def create_financial_analysis(self, df):
+
+    def _add_florida_trends_vectorized(self, data, timeline, storms=None, hurricanes=None):
+        """Applique les chocs floridiens compilés (MiamiScenario) sur des tableaux trajectoires × années"""
+        # Subprimes, afflux international, COVID, crise de l'assurance... : un multiplicateur annuel par métrique
+        for metric, multiplier in timeline["events"].items():
+            data[metric] = data[metric] * multiplier
+
+        # Tendances propres aux spécialités de la zone (croisières), appliquées après les chocs
+        for metric, multiplier in timeline["trends"].items():
+            data[metric] = data[metric] * multiplier
+
+        # Saisons cycloniques simulées (les ouragans historiques sont alors exclus des chocs)
+        if storms is not None:
+            hurricanes.apply(data, storms['Hurricane_Max_Category'])
+
+    def create_financial_analysis(self, df, output_file=None, show=True, insights=True):
         """Crée une analyse complète des finances et de l'immobilier miamien"""
         plt.style.use('seaborn-v0_8')
         fig = plt.figure(figsize=(20, 28))
@@ -862,11 +1091,15 @@ class MiamiRealEstateAnalyzer:
         plt.suptitle(f'Financial and Real Estate Analysis of {self.area}, Florida ({self.start_year}-{self.end_year})', 
                     fontsize=16, fontweight='bold')
         plt.tight_layout()
-        plt.savefig(f'{self.area.replace(" ", "_").lower()}_florida_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.savefig(output_file or f'{self.area.replace(" ", "_").lower()}_florida_analysis.png', dpi=300,
+                    bbox_inches='tight')
+        if show:
+            plt.show()
+        plt.close(fig)
         
         # Générer les insights
-        self._generate_miami_insights(df)
+        if insights:
+            self._generate_miami_insights(df)
     
     def _plot_real_estate_prices(self, df, ax):
         """Plot de l'évolution des prix immobiliers"""
@@ -1057,52 +1290,63 @@ class MiamiRealEstateAnalyzer:
         ax.legend()
         ax.grid(True, alpha=0.3, axis='y')
     
+    def _compute_insight_statistics(self, df):
+        """Calcule les statistiques clés utilisées par les insights et les exports"""
+        current_price = df['Median_Home_Price'].iloc[-1]
+        current_income = df['Median_Income'].iloc[-1]
+        current_ratio = current_price / current_income
+        
+        return {
+            'avg_home_price': df['Median_Home_Price'].mean(),
+            'avg_income': df['Median_Income'].mean(),
+            'avg_rent': df['Average_Rent'].mean(),
+            'avg_international_buyers': df['International_Buyers_Percentage'].mean(),
+            'price_growth': ((df['Median_Home_Price'].iloc[-1] /
+                              df['Median_Home_Price'].iloc[0]) - 1) * 100,
+            'condo_growth': ((df['Condo_Price_per_Sqft'].iloc[-1] /
+                              df['Condo_Price_per_Sqft'].iloc[0]) - 1) * 100,
+            'beachfront_premium': df['Beachfront_Premium'].iloc[-1],
+            'current_international': df['International_Buyers_Percentage'].iloc[-1],
+            'tourism_revenue': df['Tourism_Tax_Revenue'].iloc[-1],
+            'current_ratio': current_ratio,
+            'affordability_status': AFFORDABILITY_TIERS[int(np.digitize(current_ratio, AFFORDABILITY_THRESHOLDS,
+                                                                        right=True))],
+            'current_vacancy': df['Rental_Vacancy_Rate'].iloc[-1],
+            'insurance_cost': df['Insurance_Costs'].iloc[-1],
+            'insurance_to_income': df['Insurance_Costs'].iloc[-1] / current_income * 100,
+        }
+    
     def _generate_miami_insights(self, df):
         """Génère des insights analytiques adaptés au marché miamien"""
         print(f"🌴 MIAMI/FLORIDA REAL ESTATE INSIGHTS - {self.area}")
         print("=" * 65)
         
+        stats = self._compute_insight_statistics(df)
+        
         # 1. Statistiques de base
         print("\n1. 📈 KEY STATISTICS:")
-        avg_home_price = df['Median_Home_Price'].mean()
-        avg_income = df['Median_Income'].mean()
-        avg_rent = df['Average_Rent'].mean()
-        avg_international_buyers = df['International_Buyers_Percentage'].mean()
-        
-        print(f"Average median home price: ${avg_home_price:,.0f}")
-        print(f"Average median income: ${avg_income:,.0f}")
-        print(f"Average rent: ${avg_rent:.0f}")
-        print(f"Average international buyers: {avg_international_buyers:.1f}%")
+        print(f"Average median home price: ${stats['avg_home_price']:,.0f}")
+        print(f"Average median income: ${stats['avg_income']:,.0f}")
+        print(f"Average rent: ${stats['avg_rent']:.0f}")
+        print(f"Average international buyers: {stats['avg_international_buyers']:.1f}%")
         
         # 2. Croissance immobilière
         print("\n2. 📊 REAL ESTATE GROWTH:")
-        price_growth = ((df['Median_Home_Price'].iloc[-1] / 
-                        df['Median_Home_Price'].iloc[0]) - 1) * 100
-        condo_growth = ((df['Condo_Price_per_Sqft'].iloc[-1] / 
-                        df['Condo_Price_per_Sqft'].iloc[0]) - 1) * 100
-        
-        print(f"Home price growth ({self.start_year}-{self.end_year}): {price_growth:.1f}%")
-        print(f"Condo price growth ({self.start_year}-{self.end_year}): {condo_growth:.1f}%")
-        print(f"Beachfront premium: {df['Beachfront_Premium'].iloc[-1]:.1f}%")
+        print(f"Home price growth ({self.start_year}-{self.end_year}): {stats['price_growth']:.1f}%")
+        print(f"Condo price growth ({self.start_year}-{self.end_year}): {stats['condo_growth']:.1f}%")
+        print(f"Beachfront premium: {stats['beachfront_premium']:.1f}%")
         
         # 3. Marché international
         print("\n3. 🌍 INTERNATIONAL MARKET:")
-        current_international = df['International_Buyers_Percentage'].iloc[-1]
-        tourism_revenue = df['Tourism_Tax_Revenue'].iloc[-1]
-        
-        print(f"Current international buyers: {current_international:.1f}%")
-        print(f"Current tourism tax revenue: ${tourism_revenue:.1f}M")
+        print(f"Current international buyers: {stats['current_international']:.1f}%")
+        print(f"Current tourism tax revenue: ${stats['tourism_revenue']:.1f}M")
         
         # 4. Accessibilité et marché locatif
         print("\n4. 🏠 HOUSING AFFORDABILITY:")
-        current_price = df['Median_Home_Price'].iloc[-1]
-        current_income = df['Median_Income'].iloc[-1]
-        current_ratio = current_price / current_income
-        current_vacancy = df['Rental_Vacancy_Rate'].iloc[-1]
-        
-        affordability_status = "Critical" if current_ratio > 8 else "Severe" if current_ratio > 6 else "Moderate" if current_ratio > 4 else "Good"
-        print(f"Current price-to-income ratio: {current_ratio:.1f} ({affordability_status})")
-        print(f"Current rental vacancy rate: {current_vacancy:.1f}%")
+        print(f"Current price-to-income ratio: {stats['current_ratio']:.1f} ({stats['affordability_status']})")
+        print(f"Current rental vacancy rate: {stats['current_vacancy']:.1f}%")
+        print(f"Current home insurance premium: ${stats['insurance_cost']:,.0f} "
+              f"({stats['insurance_to_income']:.1f}% of income)")
         
         # 5. Spécificités de la zone
         print(f"\n5. 🌟 {self.area.upper()} SPECIFICS:")
@@ -1140,8 +1384,3233 @@ class MiamiRealEstateAnalyzer:
         print("• Invest in public transportation and infrastructure")
         print("• Balance tourism development with residential needs")
 
-def main():
-    """Fonction principale pour Miami/Floride"""
+
+# Paliers d'accessibilité selon le ratio prix/revenu (seuils exclusifs : > 4, > 6, > 8)
+AFFORDABILITY_TIERS = ["Good", "Moderate", "Severe", "Critical"]
+AFFORDABILITY_THRESHOLDS = [4, 6, 8]
+
+# Mode compact (opt-in) : comptages en entiers, pourcentages et montants en float32
+COUNT_COLUMNS = ['Population', 'Households', 'Home_Sales_Volume', 'New_Construction_Permits']
+STORM_COLUMNS = ['Hurricane_Count', 'Hurricane_Max_Category']
+
+
+def compact_dtype(column):
+    """Retourne le type compact d'une colonne générée"""
+    if column == 'Year':
+        return np.int16
+    if column in STORM_COLUMNS:
+        return np.int8
+    if column in COUNT_COLUMNS:
+        return np.int32
+    return np.float32
+
+
+def to_compact(values, column):
+    """Convertit un tableau de valeurs vers le type compact de sa colonne"""
+    dtype = compact_dtype(column)
+    values = np.asarray(values)
+    if np.issubdtype(dtype, np.integer) and not np.issubdtype(values.dtype, np.integer):
+        values = np.rint(values)
+    return values.astype(dtype, copy=False)
+
+
+def compact_frame(df):
+    """Retourne une copie compacte d'un DataFrame (zones en catégories)"""
+    data = {}
+    for column in df.columns:
+        if column == 'Area':
+            data[column] = df[column].astype('category')
+        else:
+            data[column] = to_compact(df[column].to_numpy(), column)
+    return pd.DataFrame(data, index=df.index)
+
+
+def memory_footprint(obj):
+    """Mesure l'empreinte mémoire (octets) d'un DataFrame, d'un panel ou d'un dict de tableaux"""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, MiamiPanelStore):
+        return obj.nbytes
+    return int(sum(np.asarray(values).nbytes for values in obj.values()))
+
+
+def memory_savings(full, compact):
+    """Compare l'empreinte mémoire des représentations standard et compacte"""
+    before = memory_footprint(full)
+    after = memory_footprint(compact)
+    savings = {
+        "before_bytes": before,
+        "after_bytes": after,
+        "saved_bytes": before - after,
+        "ratio": before / after if after else float('inf'),
+    }
+    return savings
+
+
+class MiamiProgress:
+    """Suivi des traitements longs : événements d'avancement, budgets de temps/mémoire et annulation coopérative
+
+    callback(event) reçoit un dict (unités faites/totales, débit, ETA, mémoire) ; sans callback, une ligne
+    est affichée au plus toutes les interval secondes. L'arrêt est demandé par cancel(), par un
+    threading.Event (cancel_event) ou par la création de stop_file ; le traitement termine alors ses blocs
+    en cours, les écrit sur disque et s'arrête.
+    """
+
+    def __init__(self, callback=None, interval=1.0, time_budget=None, memory_budget_mb=None, cancel_event=None,
+                 stop_file=None):
+        self.callback = callback
+        self.interval = interval
+        self.time_budget = time_budget
+        self.memory_budget_mb = memory_budget_mb
+        self.cancel_event = cancel_event
+        self.stop_file = stop_file
+        self.start()
+
+    def start(self, total=None, unit='units', label='run'):
+        """Démarre (ou redémarre) le suivi d'un traitement"""
+        self.total = total
+        self.unit = unit
+        self.label = label
+        self.done = 0
+        self.started = time.perf_counter()
+        self.last_emit = -np.inf
+        self.stop_reason = None
+        self._cancelled = False
+        return self
+
+    @staticmethod
+    def memory_mb():
+        """Mémoire résidente du processus (Mo)"""
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+        except (OSError, ValueError, IndexError):
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def event(self, kind='progress'):
+        elapsed = time.perf_counter() - self.started
+        throughput = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) if self.total is not None else None
+        return {
+            "kind": kind,
+            "label": self.label,
+            "unit": self.unit,
+            "done": self.done,
+            "total": self.total,
+            "fraction": self.done / self.total if self.total else None,
+            "elapsed": elapsed,
+            "throughput": throughput,
+            "eta": remaining / throughput if remaining is not None and throughput > 0 else None,
+            "memory_mb": self.memory_mb(),
+            "stop_reason": self.stop_reason,
+        }
+
+    def _emit(self, kind):
+        event = self.event(kind)
+        self.last_emit = event["elapsed"]
+        if self.callback is not None:
+            self.callback(event)
+            return
+        total = f'/{event["total"]:,}' if event["total"] is not None else ''
+        eta = f', ETA {event["eta"]:.0f}s' if event["eta"] is not None else ''
+        icon = {'progress': '⏳', 'finished': '✅', 'stopped': '⏹️'}[kind]
+        reason = f' ({event["stop_reason"]})' if event["stop_reason"] else ''
+        print(f"{icon} {self.label}: {event['done']:,}{total} {self.unit}, {event['throughput']:,.1f} {self.unit}/s"
+              f"{eta}, {event['memory_mb']:,.0f} MB{reason}")
+
+    def update(self, n=1):
+        """Enregistre n unités terminées et émet un événement si l'intervalle est écoulé"""
+        self.done += n
+        if time.perf_counter() - self.started - self.last_emit >= self.interval:
+            self._emit('progress')
+
+    def cancel(self):
+        """Demande un arrêt coopératif"""
+        self._cancelled = True
+
+    def should_stop(self):
+        """Vrai si une annulation est demandée ou un budget est dépassé"""
+        if self.stop_reason is None:
+            if self._cancelled or (self.cancel_event is not None and self.cancel_event.is_set()):
+                self.stop_reason = 'cancelled'
+            elif self.stop_file is not None and os.path.exists(self.stop_file):
+                self.stop_reason = 'stop file'
+            elif self.time_budget is not None and time.perf_counter() - self.started >= self.time_budget:
+                self.stop_reason = 'time budget'
+            elif self.memory_budget_mb is not None and self.memory_mb() >= self.memory_budget_mb:
+                self.stop_reason = 'memory budget'
+        return self.stop_reason is not None
+
+    def finish(self):
+        """Émet l'événement final (terminé ou arrêté)"""
+        self._emit('stopped' if self.stop_reason else 'finished')
+        return self.stop_reason is None
+
+
+class MiamiScenario:
+    """Chronologie de scénario définie comme des données : régimes par courbe et chocs annuels par métrique
+
+    Un segment de régime est (régime, début, fin, niveau, pente) et vaut niveau + pente × (année - début) ;
+    début=None ou fin=None laisse le segment ouvert. Les segments listés plus tard l'emportent ; une année non couverte
+    prolonge le dernier segment commencé. Un choc multiplie des métriques sur [début, fin].
+    """
+
+    BASELINE_CURVES = {
+        'Median_Income': [
+            ("boom", 2002, 2007, 1.0, 0.035), ("crisis", 2008, 2011, 1.0, -0.04),
+            ("recovery", 2012, 2019, 1.0, 0.04), ("covid", 2020, 2021, 1 - 0.01, 0.0),
+            ("post_covid", 2022, None, 1.0, 0.045)],
+        'International_Buyers_Percentage': [
+            ("boom", 2002, 2007, 1.0, 0.05), ("crisis", 2008, 2009, 0.70, 0.0),
+            ("recovery", 2010, 2014, 1.0, 0.04), ("international_peak", 2015, 2019, 1.3, 0.0),
+            ("covid", 2020, 2021, 0.60, 0.0), ("post_covid", 2022, None, 1.4, 0.0)],
+        'Median_Home_Price': [
+            ("boom", 2002, 2006, 1.0, 0.15), ("crisis", 2007, 2011, 0.60, 0.0),
+            ("recovery", 2012, 2019, 1.0, 0.12), ("covid", 2020, 2021, 1.15, 0.0),
+            ("post_covid", 2022, None, 1.0, 0.10)],
+        'Condo_Price_per_Sqft': [
+            ("boom", 2002, 2006, 1.0, 0.18), ("crisis", 2007, 2011, 0.55, 0.0),
+            ("recovery", 2012, 2019, 1.0, 0.14), ("covid", 2020, 2021, 1.25, 0.0),
+            ("post_covid", 2022, None, 1.0, 0.11)],
+        'Home_Sales_Volume': [
+            ("boom", 2002, 2005, 1.0, 0.15), ("crisis", 2006, 2010, 0.50, 0.0),
+            ("recovery", 2011, 2019, 1.0, 0.10), ("covid", 2020, 2021, 1.20, 0.0),
+            ("post_covid", 2022, None, 1.0, 0.08)],
+        # Niveaux absolus (points de pourcentage)
+        'Rental_Vacancy_Rate': [
+            ("boom", 2002, 2006, 6.0, -0.8), ("crisis", 2007, 2011, 6.0 + 3.0, 0.0),
+            ("recovery", 2012, 2019, 6.0, -0.4), ("covid", 2020, 2021, 6.0 - 1.0, 0.0),
+            ("post_covid", 2022, None, 6.0, -0.3)],
+        'Average_Rent': [
+            ("boom", 2002, 2007, 1.0, 0.06), ("crisis", 2008, 2010, 1.0, -0.03),
+            ("recovery", 2011, 2019, 1.0, 0.05), ("covid", 2020, 2021, 1.08, 0.0),
+            ("post_covid", 2022, None, 1.0, 0.06)],
+        'Beachfront_Premium': [
+            ("boom", 2002, 2006, 50.0, 5.0), ("crisis", 2007, 2011, 50.0 - 10, 0.0),
+            ("recovery", 2012, 2019, 50.0, 8.0), ("covid", 2020, 2021, 50.0 + 15, 0.0),
+            ("post_covid", 2022, None, 50.0 + 20, 0.0)],
+        # Multiplicateurs annuels : niveau 1 hors des années et accélérations listées
+        'Tourism_Tax_Revenue': [
+            ("base", None, None, 1.0, 0.0),
+            ("tourism_low", 2005, 2005, 0.9, 0.0), ("tourism_low", 2010, 2010, 0.9, 0.0),
+            ("tourism_low", 2015, 2015, 0.9, 0.0), ("covid", 2020, 2020, 0.9, 0.0),
+            ("tourism_high", 2007, 2007, 1.3, 0.0), ("tourism_high", 2012, 2012, 1.3, 0.0),
+            ("tourism_high", 2017, 2017, 1.3, 0.0), ("tourism_high", 2022, 2022, 1.3, 0.0)],
+        # Reconstructions historiques : remplacées par les saisons simulées si un modèle d'ouragans est fourni
+        'Infrastructure_Expenses': [
+            ("base", None, None, 1.0, 0.0),
+            ("reconstruction", 2005, 2005, 1.7, 0.0), ("reconstruction", 2012, 2012, 1.7, 0.0),
+            ("reconstruction", 2018, 2018, 1.7, 0.0), ("reconstruction", 2023, 2023, 1.7, 0.0)],
+        'Beach_Maintenance_Expenses': [
+            ("base", None, None, 1.0, 0.0),
+            ("beach_renourishment", 2004, 2004, 2.2, 0.0), ("beach_renourishment", 2010, 2010, 2.2, 0.0),
+            ("beach_renourishment", 2016, 2016, 2.2, 0.0), ("beach_renourishment", 2022, 2022, 2.2, 0.0)],
+        'Climate_Resilience_Expenses': [
+            ("base", None, None, 1.0, 0.0), ("climate_acceleration", 2015, None, 1.0, 0.10)],
+        'Budget_Balance': [
+            ("base", None, None, 1.0, 0.0), ("fiscal_improvement", 2010, None, 1.0, 0.015)],
+        'Municipal_Debt': [
+            ("base", None, None, 1.0, 0.0), ("debt_reduction", 2012, None, 1.0, -0.012)],
+        'Debt_Ratio': [
+            ("base", None, None, 1.0, 0.0), ("fiscal_improvement", 2010, None, 1.0, -0.016)],
+        'New_Construction_Permits': [
+            ("base", None, None, 1.0, 0.0),
+            ("construction_boom", 2005, 2005, 2.0, 0.0), ("construction_boom", 2013, 2013, 2.0, 0.0),
+            ("construction_boom", 2018, 2018, 2.0, 0.0), ("covid_migration", 2021, 2021, 2.0, 0.0),
+            ("construction_boom", 2024, 2024, 2.0, 0.0),
+            ("crisis", 2008, 2008, 0.4, 0.0), ("crisis", 2011, 2011, 0.4, 0.0), ("covid", 2020, 2020, 0.4, 0.0)],
+        'Real_Estate_Development': [
+            ("base", None, None, 1.0, 0.0),
+            ("development_wave", 2005, 2005, 2.2, 0.0), ("development_wave", 2013, 2013, 2.2, 0.0),
+            ("development_wave", 2018, 2018, 2.2, 0.0), ("development_wave", 2022, 2022, 2.2, 0.0)],
+        'Tourism_Infrastructure_Investment': [
+            ("base", None, None, 1.0, 0.0),
+            ("tourism_investment", 2006, 2006, 1.8, 0.0), ("tourism_investment", 2012, 2012, 1.8, 0.0),
+            ("tourism_investment", 2018, 2018, 1.8, 0.0), ("tourism_investment", 2024, 2024, 1.8, 0.0)],
+        'Climate_Adaptation_Investment': [
+            ("base", None, None, 1.0, 0.0), ("climate_acceleration", 2015, None, 1.0, 0.12)],
+        'Luxury_Development_Investment': [
+            ("base", None, None, 1.0, 0.0),
+            ("luxury_wave", 2007, 2007, 1.9, 0.0), ("luxury_wave", 2014, 2014, 1.9, 0.0),
+            ("covid", 2020, 2020, 1.9, 0.0)],
+        'Marina_Waterfront_Investment': [
+            ("base", None, None, 1.0, 0.0),
+            ("marina_wave", 2008, 2008, 1.6, 0.0), ("marina_wave", 2015, 2015, 1.6, 0.0),
+            ("covid_migration", 2021, 2021, 1.6, 0.0)],
+    }
+
+    # Chocs de _add_florida_trends ; "hurricane" : remplacés par les saisons simulées si un modèle est fourni
+    BASELINE_EVENTS = [
+        {"name": "crisis", "start": 2007, "end": 2011,
+         "factors": {'Median_Home_Price': 0.60, 'Home_Sales_Volume': 0.50, 'New_Construction_Permits': 0.40}},
+        {"name": "wilma", "start": 2005, "end": 2005, "hurricane": True,
+         "factors": {'Climate_Resilience_Expenses': 1.8, 'Beach_Maintenance_Expenses': 2.0}},
+        {"name": "international_peak", "start": 2012, "end": 2019,
+         "factors": {'International_Buyers_Percentage': 1.4, 'Luxury_Development_Investment': 1.6}},
+        {"name": "irma", "start": 2017, "end": 2017, "hurricane": True,
+         "factors": {'Climate_Adaptation_Investment': 2.2}},
+        {"name": "covid", "start": 2020, "end": 2020,
+         "factors": {'Tourism_Tax_Revenue': 0.50, 'Home_Sales_Volume': 1.20}},
+        {"name": "covid_migration", "start": 2021, "end": 2021,
+         "factors": {'Median_Home_Price': 1.15, 'Average_Rent': 1.08, 'Population': 1.03}},
+        {"name": "insurance_crisis", "start": 2022, "end": None,
+         "factors": {'Climate_Adaptation_Investment': 1.3, 'Beachfront_Premium': 0.95}},
+        # "specialty" : tendance réservée aux zones ayant cette spécialité, appliquée après les chocs
+        {"name": "cruise_expansion", "start": 2010, "end": None, "specialty": "croisières",
+         "factors": {'Tourism_Infrastructure_Investment': 1.4, 'Tourism_Tax_Revenue': 1.3}},
+    ]
+
+    def __init__(self, name='baseline', curves=None, events=None):
+        self.name = name
+        self.curves = {curve: list(segments) for curve, segments in self.BASELINE_CURVES.items()}
+        self.curves.update({curve: list(segments) for curve, segments in (curves or {}).items()})
+        self.events = [dict(event) for event in (events if events is not None else self.BASELINE_EVENTS)]
+
+    def add_regime(self, regime, start, end, curves):
+        """Nouveau scénario avec un régime supplémentaire {courbe: (niveau, pente)} sur [start, end]"""
+        scenario = MiamiScenario(self.name, self.curves, self.events)
+        for curve, (level, slope) in curves.items():
+            scenario.curves[curve].append((regime, start, end, level, slope))
+        return scenario
+
+    def add_event(self, name, start, end, factors):
+        """Nouveau scénario avec un choc multiplicatif {métrique: facteur} sur [start, end]"""
+        scenario = MiamiScenario(self.name, self.curves, self.events)
+        scenario.events.append({"name": name, "start": start, "end": end, "factors": dict(factors)})
+        return scenario
+
+    def with_segment(self, curve, regime, level=None, slope=None):
+        """Nouveau scénario où le niveau et/ou la pente d'un régime existant d'une courbe sont remplacés"""
+        scenario = MiamiScenario(self.name, self.curves, self.events)
+        segments = scenario.curves[curve]
+        for k, (name, start, end, old_level, old_slope) in enumerate(segments):
+            if name == regime:
+                segments[k] = (name, start, end, old_level if level is None else level,
+                               old_slope if slope is None else slope)
+        return scenario
+
+    def without(self, *names):
+        """Nouveau scénario sans les régimes et chocs nommés (les segments précédents sont prolongés)"""
+        curves = {curve: [segment for segment in segments if segment[0] not in names]
+                  for curve, segments in self.curves.items()}
+        events = [event for event in self.events if event["name"] not in names]
+        return MiamiScenario(self.name, curves, events)
+
+    def renamed(self, name):
+        return MiamiScenario(name, self.curves, self.events)
+
+    @staticmethod
+    def _span(years, start, end):
+        mask = np.ones(len(years), dtype=bool)
+        if start is not None:
+            mask &= years >= start
+        if end is not None:
+            mask &= years <= end
+        return mask
+
+    def compile_curve(self, curve, years):
+        """Valeurs annuelles d'une courbe de régimes"""
+        years = np.asarray(years)
+        segments = self.curves[curve]
+        index = np.full(len(years), -1)
+        for k, (_, start, end, _, _) in enumerate(segments):
+            index[self._span(years, start, end)] = k
+        # Années non couvertes : prolongement du dernier segment commencé (sinon du premier)
+        starts = np.array([start if start is not None else -np.inf for _, start, _, _, _ in segments])
+        order = np.argsort(starts, kind='stable')
+        latest = order[np.maximum(np.searchsorted(starts[order], years, side='right') - 1, 0)]
+        index = np.where(index >= 0, index, latest)
+
+        level = np.array([segment[3] for segment in segments], dtype=float)[index]
+        slope = np.array([segment[4] for segment in segments], dtype=float)[index]
+        anchor = np.array([start if start is not None else years[0] for _, start, _, _, _ in segments])[index]
+        return level + slope * (years - anchor)
+
+    def compile(self, years, historical_hurricanes=True, specialties=()):
+        """Compile le scénario en tableaux annuels : courbes de régimes, chocs et tendances des spécialités"""
+        years = np.asarray(years)
+        curves = {curve: self.compile_curve(curve, years) for curve in self.curves}
+        events, trends = {}, {}
+        for event in self.events:
+            if event.get("hurricane") and not historical_hurricanes:
+                continue
+            if "specialty" in event and event["specialty"] not in specialties:
+                continue
+            target = trends if "specialty" in event else events
+            mask = self._span(years, event["start"], event["end"])
+            for metric, factor in event["factors"].items():
+                if metric not in target:
+                    target[metric] = np.ones(len(years))
+                target[metric][mask] *= factor
+        return {"curves": curves, "events": events, "trends": trends}
+
+    @classmethod
+    def compile_batch(cls, scenarios, years, historical_hurricanes=True, specialties=()):
+        """Empile plusieurs scénarios : tableaux (scénarios, 1, années) diffusables sur les trajectoires"""
+        compiled = [scenario.compile(years, historical_hurricanes, specialties) for scenario in scenarios]
+        curves = {curve: np.stack([c["curves"][curve] for c in compiled])[:, np.newaxis, :]
+                  for curve in compiled[0]["curves"]}
+        batch = {"curves": curves}
+        for kind in ["events", "trends"]:
+            metrics = list(dict.fromkeys(metric for c in compiled for metric in c[kind]))
+            batch[kind] = {metric: np.stack([c[kind].get(metric, np.ones(len(years)))
+                                             for c in compiled])[:, np.newaxis, :]
+                           for metric in metrics}
+        return batch
+
+
+class MiamiPanelStore:
+    """Panel long format de toutes les zones, indexé par (zone, année, trajectoire)"""
+
+    def __init__(self, areas, years, columns):
+        self.areas = list(areas)
+        self.years = np.asarray(years)
+        # Une matrice (zone, année, trajectoire) par métrique : l'ordre C suit l'index long
+        self.columns = dict(columns)
+        self._indicators = None
+
+    @property
+    def indicators(self):
+        """Index d'indicateurs (CAGR, drawdowns, volatilité...), calculé une seule fois"""
+        if self._indicators is None:
+            self._indicators = MiamiIndicatorIndex.compute(self)
+        return self._indicators
+
+    @property
+    def metrics(self):
+        return list(self.columns)
+
+    @property
+    def n_paths(self):
+        first = next(iter(self.columns.values()))
+        return first.shape[2]
+
+    @property
+    def shape(self):
+        return (len(self.areas), len(self.years), self.n_paths)
+
+    @property
+    def nbytes(self):
+        return int(self.years.nbytes + sum(values.nbytes for values in self.columns.values()))
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Construit le panel à partir de DataFrames annuels {zone: df ou [df par trajectoire]}"""
+        areas = list(frames)
+        runs = {area: frames[area] if isinstance(frames[area], (list, tuple)) else [frames[area]]
+                for area in areas}
+        first = runs[areas[0]][0]
+        years = first['Year'].to_numpy()
+        metrics = [column for column in first.columns if column != 'Year']
+        n_paths = len(runs[areas[0]])
+
+        columns = {}
+        for metric in metrics:
+            values = np.empty((len(areas), len(years), n_paths), dtype=first[metric].dtype)
+            for a, area in enumerate(areas):
+                for p, df in enumerate(runs[area]):
+                    values[a, :, p] = df[metric].to_numpy()
+            columns[metric] = values
+        return cls(areas, years, columns)
+
+    @classmethod
+    def from_ensembles(cls, areas, n_paths=1, seed=None, compact=False, hurricanes=None):
+        """Génère les ensembles vectorisés de chaque zone directement dans le panel"""
+        seeds = np.random.SeedSequence(seed).spawn(len(areas)) if seed is not None else [None] * len(areas)
+        columns = {}
+        years = None
+        for a, area in enumerate(areas):
+            area_seed = seeds[a].generate_state(4) if seeds[a] is not None else None
+            ensemble = MiamiRealEstateAnalyzer(area).generate_ensemble(n_paths, seed=area_seed, compact=compact,
+                                                                       hurricanes=hurricanes)
+            years = ensemble.pop('Year')
+            for metric, values in ensemble.items():
+                if metric not in columns:
+                    columns[metric] = np.empty((len(areas), len(years), n_paths), dtype=values.dtype)
+                columns[metric][a] = values.T
+        return cls(areas, years, columns)
+
+    def compact(self):
+        """Retourne une copie du panel en types compacts"""
+        return MiamiPanelStore(self.areas, to_compact(self.years, 'Year'),
+                               {metric: to_compact(values, metric) for metric, values in self.columns.items()})
+
+    def _area_indexer(self, areas):
+        if areas is None:
+            return slice(None)
+        if isinstance(areas, str):
+            areas = [areas]
+        positions = [self.areas.index(area) for area in areas]
+        # Une plage contiguë reste une vue ; sinon indexation avancée (copie)
+        if positions == list(range(positions[0], positions[-1] + 1)):
+            return slice(positions[0], positions[-1] + 1)
+        return positions
+
+    def _year_indexer(self, years):
+        if years is None:
+            return slice(None)
+        if isinstance(years, (int, np.integer)):
+            years = (years, years)
+        start, end = years
+        lo = np.searchsorted(self.years, start if start is not None else self.years[0], side='left')
+        hi = np.searchsorted(self.years, end if end is not None else self.years[-1], side='right')
+        return slice(lo, hi)
+
+    def select(self, areas=None, years=None, metrics=None, paths=None):
+        """Découpe le panel par zone, plage d'années, métrique ou trajectoires (vues sans copie)"""
+        area_index = self._area_indexer(areas)
+        year_index = self._year_indexer(years)
+        path_index = paths if paths is not None else slice(None)
+        if isinstance(path_index, (int, np.integer)):
+            path_index = slice(path_index, path_index + 1)
+        if isinstance(metrics, str):
+            metrics = [metrics]
+        selected_metrics = metrics if metrics is not None else self.metrics
+
+        # Un axe à la fois : zones, années et trajectoires se combinent en produit cartésien
+        # (deux listes indexées ensemble seraient appariées élément par élément par numpy)
+        columns = {metric: self.columns[metric][area_index][:, year_index][:, :, path_index]
+                   for metric in selected_metrics}
+        selected_areas = (self.areas[area_index] if isinstance(area_index, slice)
+                          else [self.areas[k] for k in area_index])
+        return MiamiPanelStore(selected_areas, self.years[year_index], columns)
+
+    def values(self, metric, area=None):
+        """Retourne la matrice (zone, année, trajectoire) d'une métrique, ou (année, trajectoire) pour une zone"""
+        if area is not None:
+            return self.columns[metric][self.areas.index(area)]
+        return self.columns[metric]
+
+    def index(self):
+        """Construit l'index long (zone catégorielle, année, trajectoire)"""
+        n_areas, n_years, n_paths = self.shape
+        area_codes = np.repeat(np.arange(n_areas, dtype=np.int16), n_years * n_paths)
+        return pd.MultiIndex.from_arrays([
+            pd.Categorical.from_codes(area_codes, categories=self.areas),
+            np.tile(np.repeat(self.years, n_paths), n_areas),
+            np.tile(np.arange(n_paths), n_areas * n_years),
+        ], names=['Area', 'Year', 'Path'])
+
+    def to_frame(self):
+        """Retourne le panel au format long ; les colonnes contiguës sont exposées sans copie"""
+        data = {metric: values.reshape(-1) for metric, values in self.columns.items()}
+        return pd.DataFrame(data, index=self.index(), copy=False)
+
+    def area_frame(self, area, path=0):
+        """Retourne le DataFrame annuel d'une zone au format de generate_financial_data"""
+        a = self.areas.index(area)
+        data = {'Year': self.years}
+        data.update({metric: values[a, :, path] for metric, values in self.columns.items()})
+        return pd.DataFrame(data)
+
+    def save(self, directory):
+        """Sauvegarde le panel : un fichier .npy par métrique et des métadonnées JSON"""
+        os.makedirs(directory, exist_ok=True)
+        meta = {
+            "areas": self.areas,
+            "years": self.years.tolist(),
+            "metrics": self.metrics,
+            "dtypes": {metric: str(values.dtype) for metric, values in self.columns.items()},
+        }
+        for metric, values in self.columns.items():
+            np.save(os.path.join(directory, f'{metric}.npy'), np.ascontiguousarray(values))
+        # Statistiques min/max par (zone, année) : permettent d'écarter des blocs sans les lire
+        np.savez(os.path.join(directory, 'stats.npz'), **self.zone_maps())
+        with open(os.path.join(directory, 'panel.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        self.indicators.save(directory)
+
+    def zone_maps(self):
+        """Minimum et maximum de chaque métrique par (zone, année), sur toutes les trajectoires"""
+        minimum = np.stack([np.nanmin(np.asarray(values, dtype=float), axis=2) for values in self.columns.values()])
+        maximum = np.stack([np.nanmax(np.asarray(values, dtype=float), axis=2) for values in self.columns.values()])
+        return {"minimum": minimum, "maximum": maximum}
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Charge un panel sauvegardé ; par défaut les métriques sont mappées en mémoire"""
+        with open(os.path.join(directory, 'panel.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        columns = {metric: np.load(os.path.join(directory, f'{metric}.npy'), mmap_mode=mmap_mode)
+                   for metric in meta["metrics"]}
+        panel = cls(meta["areas"], meta["years"], columns)
+        if os.path.exists(os.path.join(directory, 'indicators.json')):
+            panel._indicators = MiamiIndicatorIndex.load(directory, mmap_mode=mmap_mode)
+        return panel
+
+
+class MiamiIndicatorIndex:
+    """Indicateurs précalculés par (indicateur, métrique, zone, trajectoire)"""
+
+    INDICATORS = ['CAGR', 'Total_Growth', 'Max_Drawdown', 'Subprime_Drawdown', 'Volatility',
+                  'Growth_5Y_Last', 'Growth_5Y_Min', 'Growth_5Y_Max']
+    # Pic pré-crise à creux post-subprime
+    SUBPRIME_WINDOW = (2006, 2012)
+    GROWTH_WINDOW = 5
+
+    def __init__(self, areas, metrics, values, indicators=None):
+        self.areas = list(areas)
+        self.metrics = list(metrics)
+        self.indicators = list(indicators or self.INDICATORS)
+        # Tableau (indicateur, métrique, zone, trajectoire)
+        self.values = values
+
+    @staticmethod
+    def _drawdown(values):
+        """Plus forte baisse pic-creux le long de l'axe des années (NaN si aucun pic positif)"""
+        peaks = np.fmax.accumulate(values, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            drawdown = np.where(peaks > 0, values / peaks - 1, np.nan)
+        valid = ~np.isnan(drawdown).all(axis=1)
+        return np.where(valid, np.nanmin(np.where(np.isnan(drawdown), np.inf, drawdown), axis=1), np.nan)
+
+    @classmethod
+    def compute(cls, panel):
+        """Calcule tous les indicateurs d'un panel en passes vectorisées (une par métrique)"""
+        years = panel.years
+        n_years = len(years)
+        window = (years >= cls.SUBPRIME_WINDOW[0]) & (years <= cls.SUBPRIME_WINDOW[1])
+        lag = cls.GROWTH_WINDOW
+        values = np.full((len(cls.INDICATORS), len(panel.metrics), len(panel.areas), panel.n_paths), np.nan)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for m, metric in enumerate(panel.metrics):
+                series = np.asarray(panel.columns[metric], dtype=float)
+                first, last = series[:, 0], series[:, -1]
+                positive = (first > 0) & (last > 0)
+                values[0, m] = np.where(positive, (last / first) ** (1 / max(n_years - 1, 1)) - 1, np.nan)
+                values[1, m] = np.where(first != 0, last / first - 1, np.nan)
+                values[2, m] = cls._drawdown(series)
+                if window.any():
+                    values[3, m] = cls._drawdown(series[:, window])
+
+                returns = np.where(series[:, :-1] != 0, series[:, 1:] / series[:, :-1] - 1, np.nan)
+                if n_years > 2:
+                    values[4, m] = np.nanstd(returns, axis=1, ddof=1)
+
+                if n_years > lag:
+                    growth = np.where(series[:, :-lag] != 0, series[:, lag:] / series[:, :-lag] - 1, np.nan)
+                    values[5, m] = growth[:, -1]
+                    values[6, m] = np.nanmin(growth, axis=1)
+                    values[7, m] = np.nanmax(growth, axis=1)
+        return cls(panel.areas, panel.metrics, values)
+
+    def query(self, metrics=None, areas=None, indicators=None, paths=None):
+        """Retourne les indicateurs au format long (zone, trajectoire) × (métrique, indicateur)"""
+        metrics = [metrics] if isinstance(metrics, str) else (metrics or self.metrics)
+        areas = [areas] if isinstance(areas, str) else (areas or self.areas)
+        indicators = [indicators] if isinstance(indicators, str) else (indicators or self.indicators)
+        path_index = np.arange(self.values.shape[3]) if paths is None else np.atleast_1d(paths)
+
+        block = self.values[np.ix_([self.indicators.index(i) for i in indicators],
+                                   [self.metrics.index(m) for m in metrics],
+                                   [self.areas.index(a) for a in areas], path_index)]
+        # (zone, trajectoire) en lignes, (métrique, indicateur) en colonnes
+        data = block.transpose(2, 3, 1, 0).reshape(len(areas) * len(path_index), -1)
+        index = pd.MultiIndex.from_product([pd.CategoricalIndex(areas), path_index], names=['Area', 'Path'])
+        columns = pd.MultiIndex.from_product([metrics, indicators], names=['Metric', 'Indicator'])
+        return pd.DataFrame(data, index=index, columns=columns)
+
+    def table(self, area, path=0):
+        """Tableau métriques × indicateurs d'une trajectoire"""
+        return pd.DataFrame(self.values[:, :, self.areas.index(area), path].T,
+                            index=pd.Index(self.metrics, name='Metric'), columns=self.indicators)
+
+    def value(self, metric, indicator, area=None):
+        """Vecteur des trajectoires d'une zone, ou matrice (zone, trajectoire)"""
+        values = self.values[self.indicators.index(indicator), self.metrics.index(metric)]
+        return values[self.areas.index(area)] if area is not None else values
+
+    def summary(self, metric, indicator, quantiles=(0.05, 0.5, 0.95)):
+        """Distribution de l'indicateur entre trajectoires, par zone"""
+        values = self.value(metric, indicator)
+        data = {'Mean': np.nanmean(values, axis=1)}
+        for q, row in zip(quantiles, np.nanquantile(values, quantiles, axis=1)):
+            data[f'P{q * 100:g}'] = row
+        return pd.DataFrame(data, index=pd.Index(self.areas, name='Area'))
+
+    def filter(self, metric, indicator, lower=None, upper=None):
+        """Trajectoires (zone, trajectoire) dont l'indicateur est dans [lower, upper]"""
+        values = self.value(metric, indicator)
+        mask = ~np.isnan(values)
+        if lower is not None:
+            mask &= values >= lower
+        if upper is not None:
+            mask &= values <= upper
+        area_idx, path_idx = np.nonzero(mask)
+        return pd.DataFrame({'Area': pd.Categorical.from_codes(area_idx, categories=self.areas),
+                             'Path': path_idx, indicator: values[mask]})
+
+    def save(self, directory):
+        """Sauvegarde l'index à côté des métriques du panel"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'indicators.npy'), np.ascontiguousarray(self.values))
+        meta = {"areas": self.areas, "metrics": self.metrics, "indicators": self.indicators}
+        with open(os.path.join(directory, 'indicators.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        with open(os.path.join(directory, 'indicators.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        values = np.load(os.path.join(directory, 'indicators.npy'), mmap_mode=mmap_mode)
+        return cls(meta["areas"], meta["metrics"], values, meta["indicators"])
+
+
+class MiamiPanelCatalog:
+    """Catalogue des panels sauvegardés sous un répertoire, interrogeable avec élagage par statistiques min/max
+
+    Les prédicats sont des tuples (expression, opérateur, valeur) ; l'expression est une métrique ou un
+    ratio 'Numérateur/Dénominateur', par ex. ('Median_Home_Price/Median_Income', '>', 8).
+    """
+
+    OPERATORS = {
+        '>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal,
+    }
+
+    def __init__(self, root):
+        self.root = root
+        self.refresh()
+
+    def refresh(self):
+        """Relit les métadonnées et statistiques de chaque panel (les métriques ne sont jamais lues ici)"""
+        self.entries = []
+        for dirpath, _, filenames in sorted(os.walk(self.root)):
+            if 'panel.json' not in filenames:
+                continue
+            with open(os.path.join(dirpath, 'panel.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            entry = {
+                "run": os.path.relpath(dirpath, self.root),
+                "directory": dirpath,
+                "areas": meta["areas"],
+                "years": np.asarray(meta["years"]),
+                "metrics": {metric: m for m, metric in enumerate(meta["metrics"])},
+                "stats": None,
+            }
+            if 'stats.npz' in filenames:
+                with np.load(os.path.join(dirpath, 'stats.npz')) as stats:
+                    entry["stats"] = (stats["minimum"], stats["maximum"])
+            self.entries.append(entry)
+        return self
+
+    @property
+    def runs(self):
+        return [entry["run"] for entry in self.entries]
+
+    @staticmethod
+    def _parse(expression):
+        return expression.split('/') if '/' in expression else [expression]
+
+    def _bounds(self, entry, expression):
+        """Bornes (min, max) d'une expression par (zone, année) ; infinies si inconnues"""
+        parts = self._parse(expression)
+        if entry["stats"] is None:
+            shape = (len(entry["areas"]), len(entry["years"]))
+            return np.full(shape, -np.inf), np.full(shape, np.inf)
+        minimum, maximum = entry["stats"]
+        lo, hi = minimum[entry["metrics"][parts[0]]], maximum[entry["metrics"][parts[0]]]
+        if len(parts) == 1:
+            return lo, hi
+        den_lo, den_hi = minimum[entry["metrics"][parts[1]]], maximum[entry["metrics"][parts[1]]]
+        # Division d'intervalles : bornes aux coins si le dénominateur ne change pas de signe
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corners = np.stack([lo / den_lo, lo / den_hi, hi / den_lo, hi / den_hi])
+        straddles = (den_lo <= 0) & (den_hi >= 0)
+        return (np.where(straddles, -np.inf, np.nanmin(corners, axis=0)),
+                np.where(straddles, np.inf, np.nanmax(corners, axis=0)))
+
+    def _candidates(self, entry, areas, years, where):
+        """Masque (zone, année) des blocs susceptibles de satisfaire tous les prédicats"""
+        area_mask = np.array([areas is None or area in areas for area in entry["areas"]])
+        year_mask = np.ones(len(entry["years"]), dtype=bool)
+        if years is not None:
+            start, end = (years, years) if isinstance(years, (int, np.integer)) else years
+            if start is not None:
+                year_mask &= entry["years"] >= start
+            if end is not None:
+                year_mask &= entry["years"] <= end
+        mask = area_mask[:, np.newaxis] & year_mask[np.newaxis, :]
+        for expression, op, value in where:
+            lo, hi = self._bounds(entry, expression)
+            # Un bloc est écarté si aucune valeur de l'intervalle [lo, hi] ne peut satisfaire le prédicat
+            mask &= (hi > value) if op == '>' else (hi >= value) if op == '>=' else \
+                    (lo < value) if op == '<' else (lo <= value)
+        return mask
+
+    @staticmethod
+    def _evaluate(arrays, expression):
+        parts = MiamiPanelCatalog._parse(expression)
+        if len(parts) == 1:
+            return arrays[parts[0]]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return arrays[parts[0]] / arrays[parts[1]]
+
+    def query(self, columns=None, areas=None, years=None, where=None, runs=None):
+        """Retourne les lignes (run, zone, année, trajectoire) satisfaisant les prédicats
+
+        columns limite les métriques lues (projection) ; par défaut, les métriques des prédicats.
+        Les statistiques d'élagage sont disponibles dans df.attrs.
+        """
+        where = [tuple(predicate) for predicate in (where or [])]
+        for _, op, _ in where:
+            if op not in self.OPERATORS:
+                raise ValueError(f"Unsupported operator: {op}")
+        areas = [areas] if isinstance(areas, str) else areas
+        columns = [columns] if isinstance(columns, str) else columns
+        expressions = (columns or []) + [expression for expression, _, _ in where]
+        needed = list(dict.fromkeys(part for expression in expressions for part in self._parse(expression)))
+        columns = columns or list(dict.fromkeys(expression for expression, _, _ in where))
+        if not needed:
+            raise ValueError("Query needs at least one column or predicate")
+
+        frames = []
+        scanned = pruned = blocks_read = 0
+        for entry in self.entries:
+            if runs is not None and entry["run"] not in runs:
+                continue
+            if any(metric not in entry["metrics"] for metric in needed):
+                continue
+            scanned += 1
+            mask = self._candidates(entry, areas, years, where)
+            if not mask.any():
+                pruned += 1
+                continue
+
+            # Lecture des seuls blocs candidats : une ligne contiguë de trajectoires par (zone, année)
+            area_idx, year_idx = np.nonzero(mask)
+            blocks_read += len(area_idx)
+            arrays = {metric: np.asarray(np.load(os.path.join(entry["directory"], f'{metric}.npy'),
+                                                 mmap_mode='r')[area_idx, year_idx], dtype=float)
+                      for metric in needed}
+            selected = np.ones(arrays[needed[0]].shape, dtype=bool)
+            for expression, op, value in where:
+                selected &= self.OPERATORS[op](self._evaluate(arrays, expression), value)
+            block, path = np.nonzero(selected)
+            if len(block) == 0:
+                continue
+
+            data = {
+                'Run': np.full(len(block), entry["run"], dtype=object),
+                'Area': np.asarray(entry["areas"], dtype=object)[area_idx[block]],
+                'Year': entry["years"][year_idx[block]],
+                'Path': path,
+            }
+            for expression in columns:
+                data[expression] = self._evaluate(arrays, expression)[block, path]
+            frames.append(pd.DataFrame(data))
+
+        result = (pd.concat(frames, ignore_index=True) if frames
+                  else pd.DataFrame(columns=['Run', 'Area', 'Year', 'Path'] + columns))
+        result['Area'] = result['Area'].astype('category')
+        result.attrs.update(runs_scanned=scanned, runs_pruned=pruned, blocks_read=blocks_read)
+        return result
+
+
+class MiamiPropertyMicrodataGenerator:
+    """Génère des transactions individuelles cohérentes avec les agrégats annuels d'une zone"""
+
+    HOUSE_SQFT_MEDIAN = 180 * 10.764
+    CONDO_SQFT_MEDIAN = 1100.0
+    SQFT_SIGMA = 0.35
+    PRICE_SIGMA = 0.25
+    RENT_SIGMA = 0.20
+    COLUMNS = {
+        "year": np.int16,
+        "is_condo": np.bool_,
+        "beachfront": np.bool_,
+        "sqft": np.float32,
+        "sale_price": np.float32,
+        "monthly_rent": np.float32,
+    }
+
+    def __init__(self, analyzer, df, rows_per_year=1_000_000, chunk_size=250_000, seed=None):
+        self.analyzer = analyzer
+        self.df = df
+        self.rows_per_year = int(rows_per_year)
+        self.chunk_size = int(chunk_size)
+        self.seed = seed
+
+    @property
+    def n_rows(self):
+        return len(self.df) * self.rows_per_year
+
+    def _generate_chunk(self, row, n, rng):
+        """Tire n propriétés pour une année ; les médianes par segment suivent les agrégats"""
+        config = self.analyzer.config
+        is_condo = rng.random(n) < config["condo_share"]
+        beachfront = rng.random(n) < config["beachfront_share"]
+
+        # Surfaces log-normales centrées sur la surface médiane de chaque segment
+        median_sqft = np.where(is_condo, self.CONDO_SQFT_MEDIAN, self.HOUSE_SQFT_MEDIAN)
+        size_factor = np.exp(self.SQFT_SIGMA * rng.standard_normal(n))
+        sqft = median_sqft * size_factor
+
+        # Maisons : médiane = Median_Home_Price ; condos : médiane du $/sqft = Condo_Price_per_Sqft
+        price_noise = np.exp(self.PRICE_SIGMA * rng.standard_normal(n))
+        house_price = row['Median_Home_Price'] * size_factor
+        condo_price = row['Condo_Price_per_Sqft'] * sqft
+        premium = np.where(beachfront, 1 + row['Beachfront_Premium'] / 100, 1.0)
+        sale_price = np.where(is_condo, condo_price, house_price) * price_noise * premium
+
+        rent_noise = np.exp(self.RENT_SIGMA * rng.standard_normal(n))
+        monthly_rent = row['Average_Rent'] * np.sqrt(size_factor) * rent_noise
+
+        return {
+            "year": np.full(n, row['Year'], dtype=np.int16),
+            "is_condo": is_condo,
+            "beachfront": beachfront,
+            "sqft": sqft.astype(np.float32),
+            "sale_price": sale_price.astype(np.float32),
+            "monthly_rent": monthly_rent.astype(np.float32),
+        }
+
+    def iter_chunks(self):
+        """Produit les transactions par blocs de chunk_size lignes, année par année"""
+        rng = np.random.default_rng(self.seed)
+        for row in self.df.to_dict('records'):
+            remaining = self.rows_per_year
+            while remaining > 0:
+                n = min(self.chunk_size, remaining)
+                yield self._generate_chunk(row, n, rng)
+                remaining -= n
+
+    def to_memmap(self, directory, progress=None):
+        """Écrit les transactions en colonnes .npy mappées en mémoire, bloc par bloc
+
+        En cas d'arrêt (MiamiProgress), les blocs écrits sont conservés et microdata.json indique
+        le nombre de lignes valides.
+        """
+        os.makedirs(directory, exist_ok=True)
+        outputs = {
+            column: np.lib.format.open_memmap(os.path.join(directory, f'{column}.npy'), mode='w+',
+                                              dtype=dtype, shape=(self.n_rows,))
+            for column, dtype in self.COLUMNS.items()
+        }
+        if progress is not None:
+            progress.start(total=self.n_rows, unit='rows', label='microdata')
+        offset = 0
+        for chunk in self.iter_chunks():
+            if progress is not None and progress.should_stop():
+                break
+            n = len(chunk["year"])
+            for column, values in chunk.items():
+                outputs[column][offset:offset + n] = values
+            offset += n
+            if progress is not None:
+                progress.update(n)
+        for values in outputs.values():
+            values.flush()
+
+        meta = {"area": self.analyzer.area, "rows": offset, "rows_per_year": self.rows_per_year,
+                "years_written": offset // self.rows_per_year, "complete": offset == self.n_rows,
+                "columns": {column: np.dtype(dtype).name for column, dtype in self.COLUMNS.items()}}
+        with open(os.path.join(directory, 'microdata.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        if progress is not None:
+            progress.finish()
+        return directory
+
+    def to_csv(self, path):
+        """Écrit les transactions en CSV en ajoutant les blocs au fil de l'eau"""
+        header = True
+        for chunk in self.iter_chunks():
+            pd.DataFrame(chunk).to_csv(path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+        return path
+
+    @staticmethod
+    def load(directory, mmap_mode='r'):
+        """Charge des microdonnées écrites par to_memmap (colonnes mappées en mémoire)"""
+        with open(os.path.join(directory, 'microdata.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        # Seules les lignes écrites sont exposées (écriture éventuellement interrompue)
+        return {column: np.load(os.path.join(directory, f'{column}.npy'), mmap_mode=mmap_mode)[:meta["rows"]]
+                for column in meta["columns"]}
+
+    def summarize(self, columns):
+        """Compare les médianes et premiums synthétiques aux agrégats annuels
+
+        Seules les années entièrement écrites sont résumées (sortie interrompue par un MiamiProgress).
+        """
+        years_written = min(len(columns["year"]) // self.rows_per_year, len(self.df))
+        if years_written == 0:
+            raise ValueError(f"No complete year in the microdata: {len(columns['year']):,} rows written, "
+                             f"{self.rows_per_year:,} rows per year")
+        rows = []
+        for k, row in enumerate(self.df.iloc[:years_written].to_dict('records')):
+            part = slice(k * self.rows_per_year, (k + 1) * self.rows_per_year)
+            is_condo = np.asarray(columns["is_condo"][part])
+            beachfront = np.asarray(columns["beachfront"][part])
+            price = np.asarray(columns["sale_price"][part], dtype=float)
+            sqft = np.asarray(columns["sqft"][part], dtype=float)
+            rent = np.asarray(columns["monthly_rent"][part], dtype=float)
+
+            houses = ~is_condo & ~beachfront
+            condos = is_condo & ~beachfront
+            premium = (np.median(price[~is_condo & beachfront]) / np.median(price[houses]) - 1) * 100
+            rows.append({
+                "Year": row['Year'],
+                "Median_Home_Price": row['Median_Home_Price'],
+                "Synthetic_Median_Home_Price": np.median(price[houses]),
+                "Condo_Price_per_Sqft": row['Condo_Price_per_Sqft'],
+                "Synthetic_Condo_Price_per_Sqft": np.median(price[condos] / sqft[condos]),
+                "Beachfront_Premium": row['Beachfront_Premium'],
+                "Synthetic_Beachfront_Premium": premium,
+                "Average_Rent": row['Average_Rent'],
+                "Synthetic_Median_Rent": np.median(rent),
+            })
+        return pd.DataFrame(rows)
+
+
+class MiamiHurricaneModel:
+    """Modèle stochastique de saisons cycloniques : arrivées de Poisson, gravité par catégorie"""
+
+    # Probabilités des catégories Saffir-Simpson 1 à 5 pour un ouragan touchant la zone
+    CATEGORY_PROBS = [0.38, 0.24, 0.20, 0.13, 0.05]
+    # Multiplicateurs appliqués selon la catégorie maximale de la saison (index 0 = aucune tempête)
+    IMPACTS = {
+        'Beach_Maintenance_Expenses': [1.0, 1.3, 1.7, 2.2, 2.8, 3.5],
+        'Climate_Resilience_Expenses': [1.0, 1.1, 1.3, 1.8, 2.1, 2.6],
+        'Climate_Adaptation_Investment': [1.0, 1.1, 1.4, 1.8, 2.2, 2.7],
+        'Median_Home_Price': [1.0, 1.0, 0.99, 0.97, 0.94, 0.90],
+        'Condo_Price_per_Sqft': [1.0, 1.0, 0.99, 0.96, 0.93, 0.88],
+        'Tourism_Tax_Revenue': [1.0, 0.98, 0.95, 0.90, 0.82, 0.75],
+    }
+    # Gros travaux d'infrastructure l'année suivant un ouragan majeur (catégorie ≥ 3)
+    MAJOR_CATEGORY = 3
+    RECONSTRUCTION_MULTIPLIER = 1.7
+
+    def __init__(self, annual_rate=0.35, category_probs=None):
+        self.annual_rate = annual_rate
+        probs = np.asarray(category_probs if category_probs is not None else self.CATEGORY_PROBS, dtype=float)
+        self.category_cdf = np.cumsum(probs / probs.sum())
+        self._impact_tables = {metric: np.asarray(values) for metric, values in self.IMPACTS.items()}
+
+    def sample_seasons(self, n_paths, years, rng=None):
+        """Tire le nombre d'ouragans et la catégorie maximale de chaque saison (trajectoire × année)"""
+        rng = rng if rng is not None else np.random.default_rng()
+        shape = (n_paths, len(years))
+        counts = rng.poisson(self.annual_rate, size=shape)
+        # Catégorie maximale de n tempêtes i.i.d. : P(max ≤ c) = F(c)^n, tirée par inversion
+        u = rng.random_sample(shape) if hasattr(rng, 'random_sample') else rng.random(shape)
+        threshold = u ** (1.0 / np.maximum(counts, 1))
+        max_category = np.searchsorted(self.category_cdf, threshold) + 1
+        max_category = np.where(counts > 0, np.minimum(max_category, len(self.category_cdf)), 0)
+        return {
+            'Hurricane_Count': counts.astype(np.int16),
+            'Hurricane_Max_Category': max_category.astype(np.int8),
+        }
+
+    def impact(self, metric, max_category):
+        """Retourne le multiplicateur d'une métrique pour chaque saison (lookup vectorisé)"""
+        return self._impact_tables[metric][max_category]
+
+    def reconstruction_multiplier(self, max_category):
+        """Multiplicateur d'infrastructure : gros travaux l'année suivant un ouragan majeur"""
+        major = max_category >= self.MAJOR_CATEGORY
+        previous_major = np.zeros_like(major)
+        previous_major[:, 1:] = major[:, :-1]
+        return np.where(previous_major, self.RECONSTRUCTION_MULTIPLIER, 1.0)
+
+    def apply(self, data, max_category):
+        """Applique les impacts des saisons simulées aux séries d'un ensemble (assurance : MiamiInsuranceModel)"""
+        for metric in ['Climate_Resilience_Expenses', 'Climate_Adaptation_Investment',
+                       'Median_Home_Price', 'Condo_Price_per_Sqft', 'Tourism_Tax_Revenue']:
+            data[metric] *= self.impact(metric, max_category)
+
+    def tail_risk(self, n_seasons=100_000, quantiles=(0.9, 0.99, 0.999), seed=None):
+        """Statistiques de risque extrême sur un grand nombre de saisons simulées"""
+        rng = np.random.default_rng(seed)
+        seasons = self.sample_seasons(n_seasons, [0], rng)
+        counts = seasons['Hurricane_Count'][:, 0]
+        max_category = seasons['Hurricane_Max_Category'][:, 0]
+        beach_multiplier = self.impact('Beach_Maintenance_Expenses', max_category)
+        price_multiplier = self.impact('Median_Home_Price', max_category)
+        return {
+            "seasons": n_seasons,
+            "p_any_hurricane": float(np.mean(counts > 0)),
+            "p_major_hurricane": float(np.mean(max_category >= self.MAJOR_CATEGORY)),
+            "category_frequencies": np.bincount(max_category, minlength=6) / n_seasons,
+            "beach_cost_multiplier_quantiles": dict(zip(quantiles, np.quantile(beach_multiplier, quantiles))),
+            "price_shock_quantiles": dict(zip(quantiles, np.quantile(1 - price_multiplier, quantiles))),
+        }
+
+
+class MiamiInsuranceModel:
+    """Modèle de prime d'assurance habitation : prix, exposition cyclonique et part en front de mer"""
+
+    # Ouragans historiques majeurs (catégorie à l'impact) : Wilma 2005, Irma 2017
+    HISTORICAL_HURRICANES = {2005: 3, 2017: 4}
+    # Sévérité par catégorie (index 0 = aucune tempête) et amortissement annuel de l'exposition
+    SEVERITY = [0.0, 0.2, 0.4, 1.0, 1.5, 2.0]
+    EXPOSURE_DECAY = 0.6
+    HURRICANE_LOAD = 0.25
+    # Surprime front de mer : proportionnelle à la part de biens exposés, plafonnée
+    BEACHFRONT_LOAD = 0.6
+    BEACHFRONT_CAP = 1.3
+    NOISE = 0.10
+    # Ratio prix/revenu auquel la prime vaut exactement la part de revenu de référence
+    REFERENCE_PRICE_TO_INCOME = 50.0
+
+    def income_burden(self, years):
+        """Part du revenu médian consacrée à l'assurance au ratio prix/revenu de référence
+
+        De 3 % en 2002 à environ 9 % en 2025 (crise de l'assurance à partir de 2022).
+        """
+        years = np.asarray(years)
+        return np.select(
+            [years <= 2004, years <= 2011, years <= 2016, years <= 2021],
+            [np.full(years.shape, 0.030), np.full(years.shape, 0.040), np.full(years.shape, 0.038),
+             0.042 + 0.004 * (years - 2017)],
+            default=0.070 + 0.008 * (years - 2022))
+
+    def beachfront_load(self, beachfront_share):
+        """Multiplicateur front de mer borné entre 1 et BEACHFRONT_CAP"""
+        share = np.clip(beachfront_share, 0.0, 1.0)
+        return np.minimum(1 + self.BEACHFRONT_LOAD * share, self.BEACHFRONT_CAP)
+
+    def historical_categories(self, years):
+        """Catégorie maximale des ouragans historiques pour chaque année"""
+        return np.array([self.HISTORICAL_HURRICANES.get(int(year), 0) for year in years], dtype=np.int8)
+
+    def exposure(self, max_category):
+        """Exposition cyclonique amortie, calculée le long de l'axe des années"""
+        severity = np.asarray(self.SEVERITY)[max_category]
+        exposure = np.empty(severity.shape)
+        current = np.zeros(severity.shape[:-1])
+        for t in range(severity.shape[-1]):
+            current = current * self.EXPOSURE_DECAY + severity[..., t]
+            exposure[..., t] = current
+        return exposure
+
+    def premiums(self, years, median_price, median_income, max_category, beachfront_share, noise=1.0):
+        """Primes annuelles pour chaque (trajectoire, année) ; max_category est diffusé sur les trajectoires
+
+        La prime est une part du revenu médian, modulée par la racine carrée du ratio prix/revenu
+        rapporté à REFERENCE_PRICE_TO_INCOME (les biens plus chers restent plus chers à assurer).
+        """
+        burden = self.income_burden(years)
+        price_factor = np.sqrt(median_price / median_income / self.REFERENCE_PRICE_TO_INCOME)
+        hurricane_load = 1 + self.HURRICANE_LOAD * self.exposure(max_category)
+        beachfront_load = self.beachfront_load(beachfront_share)
+        return median_income * burden * price_factor * hurricane_load * beachfront_load * noise
+
+
+class MiamiAffordabilityAnalyzer:
+    """Indicateurs d'accessibilité vectorisés sur toutes les zones, années et trajectoires"""
+
+    # Taux moyens annuels des prêts fixes à 30 ans aux États-Unis (%)
+    MORTGAGE_RATES = {
+        2002: 6.54, 2003: 5.83, 2004: 5.84, 2005: 5.87, 2006: 6.41, 2007: 6.34,
+        2008: 6.03, 2009: 5.04, 2010: 4.69, 2011: 4.45, 2012: 3.66, 2013: 3.98,
+        2014: 4.17, 2015: 3.85, 2016: 3.65, 2017: 3.99, 2018: 4.54, 2019: 3.94,
+        2020: 3.11, 2021: 2.96, 2022: 5.34, 2023: 6.81, 2024: 6.72, 2025: 6.70,
+    }
+
+    def __init__(self, down_payment=0.20, term_years=30):
+        self.down_payment = down_payment
+        self.term_years = term_years
+
+    def mortgage_rate_path(self, years, rate_shift=0.0):
+        """Retourne le chemin de taux annuels (%) pour les années demandées"""
+        fallback = self.MORTGAGE_RATES[max(self.MORTGAGE_RATES)]
+        return np.array([self.MORTGAGE_RATES.get(int(year), fallback) for year in years]) + rate_shift
+
+    def monthly_payment(self, price, annual_rate_pct):
+        """Mensualité d'un prêt amortissable (formule d'annuité, vectorisée)"""
+        principal = price * (1 - self.down_payment)
+        n = self.term_years * 12
+        r = np.asarray(annual_rate_pct, dtype=float) / 100 / 12
+        with np.errstate(divide='ignore', invalid='ignore'):
+            payment = principal * r / (1 - (1 + r) ** -n)
+        return np.where(r > 0, payment, principal / n)
+
+    def compute(self, panel, mortgage_rates=None, rate_shift=0.0):
+        """Calcule mensualités, taux d'effort et paliers pour chaque (zone, année, trajectoire)"""
+        price = panel.columns['Median_Home_Price'].astype(float)
+        income = panel.columns['Median_Income'].astype(float)
+        rent = panel.columns['Average_Rent'].astype(float)
+
+        # Le chemin de taux est diffusé sur l'axe des années : (années,), (années, trajectoires) ou complet
+        if mortgage_rates is None:
+            mortgage_rates = self.mortgage_rate_path(panel.years, rate_shift)
+        else:
+            mortgage_rates = np.asarray(mortgage_rates, dtype=float) + rate_shift
+        if mortgage_rates.ndim == 1:
+            mortgage_rates = mortgage_rates[np.newaxis, :, np.newaxis]
+        elif mortgage_rates.ndim == 2:
+            mortgage_rates = mortgage_rates[np.newaxis, :, :]
+
+        payment = self.monthly_payment(price, mortgage_rates)
+        insurance = panel.columns['Insurance_Costs'].astype(float) if 'Insurance_Costs' in panel.columns else 0.0
+        insurance_to_income = insurance / income
+        price_to_income = price / income
+        tiers = np.digitize(price_to_income, AFFORDABILITY_THRESHOLDS, right=True).astype(np.int8)
+        tier_shares = np.stack([(tiers == k).mean(axis=2) for k in range(len(AFFORDABILITY_TIERS))], axis=-1)
+
+        return {
+            "Monthly_Mortgage_Payment": payment,
+            "Payment_to_Income": payment * 12 / income,
+            "Rent_to_Income": rent * 12 / income,
+            "Insurance_to_Income": insurance_to_income,
+            # Coût de possession : mensualités + assurance habitation
+            "Ownership_Cost_to_Income": (payment * 12 + insurance) / income,
+            "Price_to_Income": price_to_income,
+            "Affordability_Tier": tiers,
+            "Tier_Shares": tier_shares,
+        }
+
+    def summary(self, panel, result):
+        """Résume les indicateurs par zone et par année (médianes et parts de trajectoires par palier)"""
+        n_areas, n_years, _ = panel.shape
+        data = {
+            "Area": pd.Categorical(np.repeat(panel.areas, n_years), categories=panel.areas),
+            "Year": np.tile(panel.years, n_areas),
+        }
+        for metric in ["Monthly_Mortgage_Payment", "Payment_to_Income", "Rent_to_Income", "Insurance_to_Income",
+                       "Ownership_Cost_to_Income", "Price_to_Income"]:
+            data[f"Median_{metric}"] = np.median(result[metric], axis=2).reshape(-1)
+        for k, tier in enumerate(AFFORDABILITY_TIERS):
+            data[f"Share_{tier}"] = result["Tier_Shares"][..., k].reshape(-1)
+        return pd.DataFrame(data)
+
+
+class MiamiInvestmentSimulator:
+    """Flux de trésorerie d'un investissement locatif (achat comptant), vectorisés par (zone, année d'achat, trajectoire)
+
+    asset='home' achète au Median_Home_Price ; asset='condo' achète condo_sqft pieds carrés au
+    Condo_Price_per_Sqft. L'assurance suit Insurance_Costs au prorata de la valeur du bien.
+    """
+
+    def __init__(self, asset='home', condo_sqft=1100.0, property_tax_rate=0.019, maintenance_rate=0.01,
+                 management_rate=0.08, purchase_cost=0.03, selling_cost=0.06, discount_rate=0.07):
+        if asset not in ('home', 'condo'):
+            raise ValueError(f"Unknown asset type: {asset}")
+        self.asset = asset
+        self.condo_sqft = condo_sqft
+        self.property_tax_rate = property_tax_rate
+        self.maintenance_rate = maintenance_rate
+        self.management_rate = management_rate
+        self.purchase_cost = purchase_cost
+        self.selling_cost = selling_cost
+        self.discount_rate = discount_rate
+
+    def cash_flows(self, panel):
+        """Valeur du bien et flux nets annuels de détention pour chaque (zone, année, trajectoire)"""
+        home_price = panel.columns['Median_Home_Price'].astype(float)
+        if self.asset == 'condo':
+            value = panel.columns['Condo_Price_per_Sqft'].astype(float) * self.condo_sqft
+        else:
+            value = home_price
+        occupancy = 1 - panel.columns['Rental_Vacancy_Rate'].astype(float) / 100
+        rent = panel.columns['Average_Rent'].astype(float) * 12 * occupancy
+        if 'Insurance_Costs' in panel.columns:
+            insurance = panel.columns['Insurance_Costs'].astype(float) * value / home_price
+        else:
+            insurance = np.zeros_like(value)
+        taxes = value * self.property_tax_rate
+        operating = rent * self.management_rate + value * self.maintenance_rate
+        return {
+            "Property_Value": value,
+            "Net_Rent": rent,
+            "Property_Taxes": taxes,
+            "Insurance": insurance,
+            "Net_Cash_Flow": rent - operating - taxes - insurance,
+        }
+
+    def _deal_npv(self, flows, value, horizon, rate):
+        """VAN de chaque achat (zone, année d'achat, trajectoire) revendu après horizon années, au taux rate"""
+        n_years = value.shape[1]
+        npv = -value * (1 + self.purchase_cost)
+        discount = np.ones_like(npv)
+        for k in range(1, int(np.nanmax(horizon, initial=0)) + 1):
+            discount = discount / (1 + rate)
+            active = k <= horizon
+            # Flux de l'année s + k (décalage le long de l'axe des années)
+            shifted = np.full_like(npv, np.nan)
+            shifted[:, :n_years - k] = flows[:, k:]
+            npv = npv + np.where(active, shifted * discount, 0.0)
+            sale = np.full_like(npv, np.nan)
+            sale[:, :n_years - k] = value[:, k:] * (1 - self.selling_cost)
+            npv = npv + np.where(k == horizon, sale * discount, 0.0)
+        return npv
+
+    def evaluate(self, panel, holding_years=10, iterations=60, rate_bounds=(-0.99, 1.0)):
+        """VAN, TRI et durée de détention d'équilibre pour chaque (zone, année d'achat, trajectoire)
+
+        holding_years=None détient jusqu'à la dernière année simulée ; sinon les achats trop tardifs
+        pour l'horizon donnent NaN. Le TRI est obtenu par bissection vectorisée (NaN sans changement de signe).
+        """
+        flows = self.cash_flows(panel)
+        value, net = flows["Property_Value"], flows["Net_Cash_Flow"]
+        n_years = len(panel.years)
+        remaining = (n_years - 1 - np.arange(n_years))[np.newaxis, :, np.newaxis]
+        if holding_years is None:
+            horizon = np.broadcast_to(remaining, value.shape).astype(float)
+        else:
+            horizon = np.broadcast_to(np.where(remaining >= holding_years, float(holding_years), np.nan),
+                                      value.shape)
+        horizon = np.where(horizon >= 1, horizon, np.nan)
+        valid = ~np.isnan(horizon)
+        h = np.where(valid, horizon, 0)
+
+        npv = np.where(valid, self._deal_npv(net, value, h, self.discount_rate), np.nan)
+
+        # Bissection : flux conventionnels (achat puis flux), la VAN décroît avec le taux
+        lo = np.full(value.shape, rate_bounds[0])
+        hi = np.full(value.shape, rate_bounds[1])
+        npv_lo = self._deal_npv(net, value, h, lo)
+        npv_hi = self._deal_npv(net, value, h, hi)
+        bracketed = valid & (np.sign(npv_lo) != np.sign(npv_hi))
+        for _ in range(iterations):
+            mid = (lo + hi) / 2
+            npv_mid = self._deal_npv(net, value, h, mid)
+            same_side = np.sign(npv_mid) == np.sign(npv_lo)
+            lo = np.where(same_side, mid, lo)
+            npv_lo = np.where(same_side, npv_mid, npv_lo)
+            hi = np.where(same_side, hi, mid)
+        irr = np.where(bracketed, (lo + hi) / 2, np.nan)
+
+        return {
+            **flows,
+            "Holding_Years": horizon,
+            "NPV": npv,
+            "IRR": irr,
+            "Break_Even_Years": self.break_even(net, value),
+        }
+
+    def break_even(self, net, value):
+        """Première durée de détention dont la VAN (revente incluse) devient positive ; NaN sinon"""
+        n_years = value.shape[1]
+        t = np.arange(n_years, dtype=float)
+        discount = (1 + self.discount_rate) ** -t[np.newaxis, :, np.newaxis]
+        cumulative = np.cumsum(net * discount, axis=1)
+        sale = value * (1 - self.selling_cost) * discount
+
+        # VAN(s, H) = -coût[s] + (cumul[H] - cumul[s]) / d[s] + vente[H] / d[s], pour H > s
+        npv = (-value[:, :, np.newaxis] * (1 + self.purchase_cost)
+               + ((cumulative[:, np.newaxis, :] - cumulative[:, :, np.newaxis]) + sale[:, np.newaxis, :])
+               / discount[:, :, np.newaxis])
+        later = t[np.newaxis, :] > t[:, np.newaxis]
+        positive = (npv >= 0) & later[np.newaxis, :, :, np.newaxis]
+        first = np.argmax(positive, axis=2).astype(float)
+        return np.where(positive.any(axis=2), first - t[np.newaxis, :, np.newaxis], np.nan)
+
+    def summary(self, panel, result):
+        """Médianes par zone et année d'achat, et part des trajectoires dont le TRI dépasse le taux d'actualisation"""
+        n_areas, n_years, _ = panel.shape
+        data = {
+            "Area": pd.Categorical(np.repeat(panel.areas, n_years), categories=panel.areas),
+            "Purchase_Year": np.tile(panel.years, n_areas),
+        }
+        for metric in ["Property_Value", "Net_Cash_Flow", "NPV", "IRR", "Break_Even_Years"]:
+            data[f"Median_{metric}"] = np.nanmedian(result[metric], axis=2).reshape(-1)
+        data["Share_Break_Even"] = (~np.isnan(result["Break_Even_Years"])).mean(axis=2).reshape(-1)
+        with np.errstate(invalid='ignore'):
+            data["Share_IRR_Above_Discount"] = np.where(
+                np.isnan(result["IRR"]).all(axis=2), np.nan,
+                (result["IRR"] > self.discount_rate).mean(axis=2)).reshape(-1)
+        return pd.DataFrame(data)
+
+
+class MiamiComparisonRenderer:
+    """Figure de comparaison multi-zones (petits multiples) rendue en une seule passe"""
+
+    METRICS = ['Median_Home_Price', 'Average_Rent', 'International_Buyers_Percentage',
+               'Climate_Resilience_Expenses']
+    TITLES = {
+        'Median_Home_Price': 'Median Home Price (Thousand $)',
+        'Average_Rent': 'Average Rent ($)',
+        'International_Buyers_Percentage': 'International Buyers (%)',
+        'Climate_Resilience_Expenses': 'Climate Resilience (M$)',
+    }
+    SCALES = {'Median_Home_Price': 1 / 1000}
+    COLORS = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#F9A602', '#6A0572',
+              '#AB83A1', '#8B0000', '#228B22', '#FFD700', '#0038A8']
+
+    def __init__(self, metrics=None, dpi=100, panel_size=(3.2, 1.6)):
+        self.metrics = list(metrics) if metrics is not None else list(self.METRICS)
+        self.dpi = dpi
+        self.panel_size = panel_size
+        self.fig = None
+        self._layout = None
+        self._lines = {}
+
+    def _precompute(self, panel):
+        """Calcule en une passe la médiane et la bande 10-90 % de chaque métrique"""
+        stats = {}
+        for metric in self.metrics:
+            values = panel.columns[metric].astype(float) * self.SCALES.get(metric, 1.0)
+            stats[metric] = np.nanpercentile(values, [10, 50, 90], axis=2)
+        return stats
+
+    def _build(self, panel):
+        """Crée la grille d'axes partagés et les artistes réutilisés entre rendus"""
+        if self.fig is not None:
+            plt.close(self.fig)
+        n_areas, n_metrics = len(panel.areas), len(self.metrics)
+        width, height = self.panel_size
+        self.fig, axes = plt.subplots(n_areas, n_metrics, sharex=True, sharey='col', squeeze=False,
+                                      figsize=(width * n_metrics, height * n_areas))
+        self._lines = {}
+        for a, area in enumerate(panel.areas):
+            color = self.COLORS[a % len(self.COLORS)]
+            for m, metric in enumerate(self.metrics):
+                ax = axes[a, m]
+                median, = ax.plot(panel.years, np.zeros(len(panel.years)), color=color, linewidth=1.5)
+                low, = ax.plot(panel.years, np.zeros(len(panel.years)), color=color, linewidth=0.6,
+                               alpha=0.5, linestyle='--')
+                high, = ax.plot(panel.years, np.zeros(len(panel.years)), color=color, linewidth=0.6,
+                                alpha=0.5, linestyle='--')
+                self._lines[a, m] = (low, median, high)
+                ax.grid(True, alpha=0.3)
+                ax.tick_params(labelsize=7)
+                if a == 0:
+                    ax.set_title(self.TITLES.get(metric, metric), fontsize=9, fontweight='bold')
+                if m == 0:
+                    ax.set_ylabel(area, fontsize=8)
+        self._axes = axes
+        self._layout = (tuple(panel.areas), tuple(panel.years))
+        self.fig.tight_layout()
+
+    def render(self, panel, output_file='miami_areas_comparison.png', show=False):
+        """Dessine toutes les zones ; les artistes sont réutilisés si la grille est inchangée"""
+        stats = self._precompute(panel)
+        if self._layout != (tuple(panel.areas), tuple(panel.years)):
+            self._build(panel)
+
+        for (a, m), lines in self._lines.items():
+            for line, values in zip(lines, stats[self.metrics[m]][:, a, :]):
+                line.set_ydata(values)
+        # Les axes y sont partagés par colonne : recalcul des limites puis mise à l'échelle commune
+        for ax in self._axes.flat:
+            ax.relim()
+        for ax in self._axes[0]:
+            ax.autoscale_view()
+
+        self.fig.suptitle(f'Miami/Florida Areas Comparison ({panel.years[0]}-{panel.years[-1]})',
+                          fontsize=12, fontweight='bold', y=1.0)
+        if output_file:
+            self.fig.savefig(output_file, dpi=self.dpi, bbox_inches='tight')
+        if show:
+            plt.show()
+        return self.fig
+
+
+class MiamiTimelapseExporter:
+    """Export animé (GIF/MP4) de l'évolution du marché, par blitting des seuls artistes modifiés"""
+
+    PANELS = ['_plot_real_estate_prices', '_plot_rental_market', '_plot_miami_investments']
+
+    def __init__(self, analyzer, df, panels=None, frames_per_year=10, fps=30, dpi=80, figsize=(15, 4.5)):
+        self.analyzer = analyzer
+        self.df = df
+        self.panels = list(panels) if panels is not None else list(self.PANELS)
+        self.frames_per_year = frames_per_year
+        self.fps = fps
+        self.dpi = dpi
+        self.figsize = figsize
+
+    @property
+    def n_frames(self):
+        return (len(self.df) - 1) * self.frames_per_year + 1
+
+    def _setup(self):
+        """Dessine les panneaux _plot_* une fois, puis capture le fond statique"""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        with plt.style.context('seaborn-v0_8'):
+            fig = Figure(figsize=self.figsize, dpi=self.dpi)
+            canvas = FigureCanvasAgg(fig)
+            for k, panel in enumerate(self.panels):
+                ax = fig.add_subplot(1, len(self.panels), k + 1)
+                getattr(self.analyzer, panel)(self.df, ax)
+            fig.suptitle(f'{self.analyzer.area}, Florida - Market Evolution', fontsize=13, fontweight='bold')
+            fig.tight_layout()
+
+        years = self.df['Year'].to_numpy(dtype=float)
+        lines, bars = [], []
+        for ax in fig.axes:
+            for line in ax.get_lines():
+                x, y = (np.asarray(values, dtype=float) for values in line.get_data())
+                line.set_animated(True)
+                lines.append((ax, line, x, y))
+            for rect in ax.patches:
+                # Chaque barre est rattachée à l'indice de son année
+                index = int(np.argmin(np.abs(years - (rect.get_x() + rect.get_width() / 2))))
+                rect.set_animated(True)
+                bars.append((ax, rect, index, rect.get_y(), rect.get_height()))
+        label = fig.text(0.99, 0.01, '', ha='right', va='bottom', fontsize=12, fontweight='bold',
+                         animated=True)
+
+        canvas.draw()
+        background = canvas.copy_from_bbox(fig.bbox)
+        return fig, canvas, background, years, lines, bars, label
+
+    def iter_frames(self):
+        """Produit chaque image RGBA (hauteur × largeur × 4, copie indépendante) en ne redessinant que les artistes animés"""
+        fig, canvas, background, years, lines, bars, label = self._setup()
+        for frame in range(self.n_frames):
+            t = frame / self.frames_per_year
+            k = min(int(t), len(years) - 1)
+            fraction = t - k
+            current_year = years[0] + t
+
+            canvas.restore_region(background)
+            for ax, line, x, y in lines:
+                shown = x <= current_year
+                x_shown, y_shown = x[shown], y[shown]
+                if fraction > 0 and k + 1 < len(x) == len(years):
+                    # Point de tête interpolé entre deux années
+                    x_shown = np.append(x_shown, current_year)
+                    y_shown = np.append(y_shown, y[k] + (y[k + 1] - y[k]) * fraction)
+                line.set_data(x_shown, y_shown)
+                ax.draw_artist(line)
+            for ax, rect, index, y0, height in bars:
+                # Barres des années écoulées pleines, barre de l'année suivante en croissance
+                scale = 1.0 if index <= k else fraction if index == k + 1 else 0.0
+                rect.set_y(y0 * scale)
+                rect.set_height(height * scale)
+                ax.draw_artist(rect)
+            label.set_text(f'{int(current_year)}')
+            fig.draw_artist(label)
+            canvas.blit(fig.bbox)
+            # Copie : le tampon du canevas est réutilisé par l'image suivante
+            yield np.array(canvas.buffer_rgba(), copy=True)
+
+    def to_gif(self, output_file):
+        """Encode l'animation en GIF via Pillow (palette fixe calculée sur la dernière image)"""
+        from PIL import Image
+
+        frames = [Image.fromarray(rgba).convert('RGB') for rgba in self.iter_frames()]
+        palette = frames[-1].quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+        frames = [frame.quantize(palette=palette, dither=Image.Dither.NONE) for frame in frames]
+        frames[0].save(output_file, save_all=True, append_images=frames[1:],
+                       duration=int(1000 / self.fps), loop=0, optimize=False)
+        print(f"🎞️ Animation saved: {output_file}")
+        return output_file
+
+    def to_mp4(self, output_file):
+        """Encode l'animation en MP4 en envoyant les images brutes à un ffmpeg local"""
+        import shutil
+        import subprocess
+
+        ffmpeg = shutil.which(plt.rcParams['animation.ffmpeg_path'])
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg was not found; install it or export a GIF with to_gif()")
+
+        frames = self.iter_frames()
+        first = next(frames)
+        height, width = first.shape[:2]
+        command = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgba',
+                   '-s', f'{width}x{height}', '-r', str(self.fps), '-i', '-',
+                   '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', '-vcodec', 'libx264',
+                   output_file]
+        process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        process.stdin.write(first.tobytes())
+        for rgba in frames:
+            process.stdin.write(rgba.tobytes())
+        process.stdin.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to encode {output_file}")
+        print(f"🎞️ Animation saved: {output_file}")
+        return output_file
+
+    def save(self, output_file):
+        """Exporte en MP4 ou GIF selon l'extension du fichier"""
+        if output_file.lower().endswith('.gif'):
+            return self.to_gif(output_file)
+        return self.to_mp4(output_file)
+
+
+class MiamiExcelExporter:
+    """Export Excel en flux (openpyxl write-only) : une feuille par zone et une feuille de synthèse"""
+
+    SUMMARY_COLUMNS = [
+        ('Area', 'area'),
+        ('Average Median Home Price ($)', 'avg_home_price'),
+        ('Average Median Income ($)', 'avg_income'),
+        ('Average Rent ($)', 'avg_rent'),
+        ('Average International Buyers (%)', 'avg_international_buyers'),
+        ('Home Price Growth (%)', 'price_growth'),
+        ('Condo Price Growth (%)', 'condo_growth'),
+        ('Beachfront Premium (%)', 'beachfront_premium'),
+        ('Current International Buyers (%)', 'current_international'),
+        ('Current Tourism Tax Revenue (M$)', 'tourism_revenue'),
+        ('Price-to-Income Ratio', 'current_ratio'),
+        ('Affordability', 'affordability_status'),
+        ('Rental Vacancy Rate (%)', 'current_vacancy'),
+        ('Home Insurance Premium ($)', 'insurance_cost'),
+        ('Insurance-to-Income (%)', 'insurance_to_income'),
+    ]
+
+    def __init__(self, percentiles=(5, 50, 95), chunk_rows=10_000):
+        self.percentiles = list(percentiles)
+        self.chunk_rows = chunk_rows
+
+    @staticmethod
+    def _sheet_title(title, used):
+        """Nom de feuille valide pour Excel (31 caractères, unique)"""
+        for char in '[]:*?/\\':
+            title = title.replace(char, '-')
+        title = title[:31]
+        candidate, k = title, 1
+        while candidate in used:
+            suffix = f' ({k})'
+            candidate = title[:31 - len(suffix)] + suffix
+            k += 1
+        used.add(candidate)
+        return candidate
+
+    @staticmethod
+    def _header(ws, names):
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+
+        cells = []
+        for name in names:
+            cell = WriteOnlyCell(ws, value=name)
+            cell.font = Font(bold=True)
+            cells.append(cell)
+        ws.append(cells)
+
+    def _append_columns(self, ws, columns):
+        """Ajoute des lignes à partir de colonnes NumPy, par blocs (NaN → cellule vide)"""
+        n_rows = len(columns[0])
+        for start in range(0, n_rows, self.chunk_rows):
+            block = [np.asarray(values[start:start + self.chunk_rows]) for values in columns]
+            for row in zip(*(values.tolist() for values in block)):
+                ws.append([None if isinstance(value, float) and value != value else value for value in row])
+
+    def export(self, output_file, frames=None, panel=None):
+        """Écrit le classeur ; frames = {zone: DataFrame annuel}, panel = ensemble multi-trajectoires"""
+        from openpyxl import Workbook
+
+        if frames is None and panel is None:
+            raise ValueError("Provide area frames, a panel, or both")
+        areas = list(frames) if frames is not None else list(panel.areas)
+
+        wb = Workbook(write_only=True)
+        used = set()
+
+        # Feuille de synthèse construite à partir des statistiques des insights
+        ws = wb.create_sheet(self._sheet_title('Summary', used))
+        self._header(ws, [name for name, _ in self.SUMMARY_COLUMNS])
+        for area in areas:
+            if frames is not None:
+                df = frames[area]
+            else:
+                df = pd.DataFrame({'Year': panel.years, **{metric: np.median(panel.values(metric, area), axis=1)
+                                                           for metric in panel.metrics}})
+            stats = MiamiRealEstateAnalyzer(area)._compute_insight_statistics(df)
+            stats['area'] = area
+            ws.append([stats[key].item() if hasattr(stats[key], 'item') else stats[key]
+                       for _, key in self.SUMMARY_COLUMNS])
+
+        for area in areas:
+            ws = wb.create_sheet(self._sheet_title(area, used))
+            if frames is not None:
+                # Lignes annuelles (ou mensuelles) de la zone, sans copie du DataFrame
+                df = frames[area]
+                self._header(ws, list(df.columns))
+                self._append_columns(ws, [df[column].to_numpy() for column in df.columns])
+            else:
+                a = panel.areas.index(area)
+                n_years, n_paths = len(panel.years), panel.n_paths
+                self._header(ws, ['Year', 'Path'] + panel.metrics)
+                columns = [np.repeat(panel.years, n_paths), np.tile(np.arange(n_paths), n_years)]
+                columns += [panel.columns[metric][a].reshape(-1) for metric in panel.metrics]
+                self._append_columns(ws, columns)
+
+            if panel is not None and panel.n_paths > 1:
+                ws = wb.create_sheet(self._sheet_title(f'{area} pct', used))
+                self._header(ws, ['Year', 'Metric'] + [f'P{q}' for q in self.percentiles])
+                a = panel.areas.index(area)
+                for metric in panel.metrics:
+                    values = panel.columns[metric][a].astype(float)
+                    if np.isnan(values).all():
+                        continue
+                    quantiles = np.nanpercentile(values, self.percentiles, axis=1)
+                    metric_column = np.full(len(panel.years), metric, dtype=object)
+                    self._append_columns(ws, [panel.years, metric_column] + list(quantiles))
+
+        wb.save(output_file)
+        print(f"📗 Excel workbook saved: {output_file}")
+        return output_file
+
+
+class MiamiDataValidator:
+    """Vérifie les identités comptables, les bornes et les valeurs manquantes des données générées"""
+
+    REVENUE_COMPONENTS = ['Property_Tax_Revenue', 'Tourism_Tax_Revenue', 'Sales_Tax_Revenue', 'Other_Revenue']
+    EXPENSE_COMPONENTS = ['Infrastructure_Expenses', 'Public_Safety_Expenses', 'Beach_Maintenance_Expenses',
+                          'Climate_Resilience_Expenses']
+    # Bornes (minimum, maximum) ; None = non borné
+    BOUNDS = {
+        'Rental_Vacancy_Rate': (2.0, None),
+        'Beachfront_Premium': (30.0, None),
+        'International_Buyers_Percentage': (10.0, 60.0),
+        'Median_Home_Price': (0.0, None),
+        'Condo_Price_per_Sqft': (0.0, None),
+        'Average_Rent': (0.0, None),
+        'Population': (0.0, None),
+        'Home_Sales_Volume': (0.0, None),
+        'New_Construction_Permits': (0.0, None),
+    }
+    # Ratios signalés par check() mais jamais corrigés : nom -> (numérateur, dénominateur, minimum, maximum)
+    RATIO_BOUNDS = {
+        'Insurance_to_Income': ('Insurance_Costs', 'Median_Income', 0.0, 0.25),
+    }
+
+    def __init__(self, rtol=1e-6):
+        self.rtol = rtol
+
+    @staticmethod
+    def _columns(data):
+        """Accès uniforme aux colonnes d'un DataFrame, d'un panel ou d'un dict de tableaux"""
+        if isinstance(data, pd.DataFrame):
+            return {column: data[column].to_numpy() for column in data.columns}
+        if isinstance(data, MiamiPanelStore):
+            return data.columns
+        return data
+
+    def check(self, data):
+        """Évalue toutes les règles sur des tableaux entiers et retourne un rapport par règle"""
+        columns = self._columns(data)
+        rows = []
+
+        def record(check, column, violations, total, max_deviation=np.nan):
+            rows.append({'Check': check, 'Column': column, 'Violations': int(violations),
+                         'Rows': int(total), 'Max_Deviation': float(max_deviation)})
+
+        if all(column in columns for column in ['Total_Revenue'] + self.REVENUE_COMPONENTS):
+            total = np.asarray(columns['Total_Revenue'], dtype=float)
+            expected = sum(np.asarray(columns[column], dtype=float) for column in self.REVENUE_COMPONENTS)
+            gap = np.abs(total - expected)
+            bad = gap > self.rtol * np.abs(expected)
+            record('identity: revenue = sum of components', 'Total_Revenue', bad.sum(), bad.size,
+                   gap.max(initial=0.0))
+
+        if all(column in columns for column in ['Budget_Balance', 'Total_Revenue', 'Total_Expenses']):
+            expected = (np.asarray(columns['Total_Revenue'], dtype=float)
+                        - np.asarray(columns['Total_Expenses'], dtype=float))
+            gap = np.abs(np.asarray(columns['Budget_Balance'], dtype=float) - expected)
+            bad = gap > self.rtol * np.maximum(np.abs(expected), 1.0)
+            record('identity: balance = revenue - expenses', 'Budget_Balance', bad.sum(), bad.size,
+                   gap.max(initial=0.0))
+
+        if all(column in columns for column in ['Total_Expenses'] + self.EXPENSE_COMPONENTS):
+            total = np.asarray(columns['Total_Expenses'], dtype=float)
+            components = sum(np.asarray(columns[column], dtype=float) for column in self.EXPENSE_COMPONENTS)
+            shortfall = components - total
+            bad = shortfall > self.rtol * np.abs(components)
+            record('identity: expenses >= listed components', 'Total_Expenses', bad.sum(), bad.size,
+                   np.maximum(shortfall, 0).max(initial=0.0))
+
+        for column, (low, high) in self.BOUNDS.items():
+            if column not in columns:
+                continue
+            values = np.asarray(columns[column], dtype=float)
+            below = values < low if low is not None else np.zeros(values.shape, dtype=bool)
+            above = values > high if high is not None else np.zeros(values.shape, dtype=bool)
+            deviation = np.maximum(low - values if low is not None else 0, values - high if high is not None else 0)
+            record(f'bounds: [{low}, {high}]', column, (below | above).sum(), values.size,
+                   np.maximum(deviation, 0).max(initial=0.0))
+
+        for name, (numerator, denominator, low, high) in self.RATIO_BOUNDS.items():
+            if numerator not in columns or denominator not in columns:
+                continue
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = np.asarray(columns[numerator], dtype=float) / np.asarray(columns[denominator], dtype=float)
+            deviation = np.maximum(low - ratio, ratio - high)
+            record(f'ratio: [{low}, {high}]', name, (deviation > 0).sum(), ratio.size,
+                   np.maximum(np.nan_to_num(deviation, nan=0.0), 0).max(initial=0.0))
+
+        for column, values in columns.items():
+            values = np.asarray(values)
+            if np.issubdtype(values.dtype, np.floating):
+                missing = np.isnan(values).sum()
+                if missing:
+                    record('missing values', column, missing, values.size)
+
+        report = pd.DataFrame(rows, columns=['Check', 'Column', 'Violations', 'Rows', 'Max_Deviation'])
+        report['Passed'] = report['Violations'] == 0
+        return report
+
+    def reconcile(self, data, fill_missing=None):
+        """Corrige en place les identités et les bornes (et optionnellement les valeurs manquantes)
+
+        Les tableaux en lecture seule (panel chargé en mmap_mode='r', panel partagé) sont refusés :
+        corriger alors une copie, par exemple MiamiPanelStore.load(directory, mmap_mode=None).
+        """
+        columns = self._columns(data)
+        if not isinstance(data, pd.DataFrame):
+            targets = ['Total_Revenue', 'Total_Expenses', 'Budget_Balance'] + list(self.BOUNDS)
+            if fill_missing is not None:
+                targets = list(columns)
+            read_only = [column for column in targets
+                         if column in columns and not np.asarray(columns[column]).flags.writeable]
+            if read_only:
+                raise ValueError(f"Cannot reconcile read-only columns in place: {', '.join(read_only)}; "
+                                 f"reconcile a writable copy instead")
+
+        def assign(column, values):
+            # Écriture en place pour conserver les vues (panel, ensembles) ou la colonne du DataFrame
+            if isinstance(data, pd.DataFrame):
+                data[column] = values
+            else:
+                columns[column][...] = values
+
+        if all(column in columns for column in ['Total_Revenue'] + self.REVENUE_COMPONENTS):
+            assign('Total_Revenue', sum(np.asarray(columns[column], dtype=float)
+                                        for column in self.REVENUE_COMPONENTS))
+        if all(column in columns for column in ['Total_Expenses'] + self.EXPENSE_COMPONENTS):
+            components = sum(np.asarray(columns[column], dtype=float) for column in self.EXPENSE_COMPONENTS)
+            assign('Total_Expenses', np.maximum(np.asarray(columns['Total_Expenses'], dtype=float), components))
+        if all(column in columns for column in ['Budget_Balance', 'Total_Revenue', 'Total_Expenses']):
+            columns = self._columns(data)
+            assign('Budget_Balance', np.asarray(columns['Total_Revenue'], dtype=float)
+                   - np.asarray(columns['Total_Expenses'], dtype=float))
+        for column, (low, high) in self.BOUNDS.items():
+            if column in columns:
+                assign(column, np.clip(np.asarray(columns[column], dtype=float), low, high))
+        if fill_missing is not None:
+            for column, values in self._columns(data).items():
+                values = np.asarray(values)
+                if np.issubdtype(values.dtype, np.floating) and np.isnan(values).any():
+                    assign(column, np.where(np.isnan(values), fill_missing, values))
+        if isinstance(data, MiamiPanelStore):
+            # Les indicateurs mis en cache portaient sur les valeurs avant correction
+            data._indicators = None
+        return data
+
+
+class MiamiQuantileSketch:
+    """Sketch de quantiles fusionnable à buckets logarithmiques (précision relative), vectorisé par cellule"""
+
+    def __init__(self, n_cells, relative_accuracy=0.01, min_value=1e-4, max_value=1e10, counts=None):
+        self.n_cells = n_cells
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.min_key = int(np.floor(np.log(min_value) / self._log_gamma))
+        self.max_key = int(np.ceil(np.log(max_value) / self._log_gamma))
+        self.n_keys = self.max_key - self.min_key + 1
+        # Buckets : négatifs (du plus petit au plus grand), zéro, puis positifs
+        self.n_bins = 2 * self.n_keys + 1
+        self.counts = counts if counts is not None else np.zeros((n_cells, self.n_bins), dtype=np.int32)
+
+    @property
+    def nbytes(self):
+        return self.n_cells * self.n_bins * 4
+
+    def _bins(self, values):
+        magnitude = np.abs(values)
+        with np.errstate(divide='ignore'):
+            keys = np.ceil(np.log(magnitude) / self._log_gamma)
+        keys = np.clip(np.nan_to_num(keys, neginf=self.min_key), self.min_key, self.max_key).astype(np.int64)
+        bins = np.where(values > 0, self.n_keys + 1 + (keys - self.min_key), self.max_key - keys)
+        return np.where(magnitude < self.min_value, self.n_keys, bins)
+
+    def block_counts(self, values):
+        """Comptes creux (indices de buckets, effectifs) d'un bloc (observations, cellules) ; NaN ignorés"""
+        values = np.asarray(values, dtype=float).reshape(-1, self.n_cells)
+        cells = np.broadcast_to(np.arange(self.n_cells), values.shape)
+        valid = ~np.isnan(values)
+        flat = cells[valid] * self.n_bins + self._bins(values[valid])
+        return np.unique(flat, return_counts=True)
+
+    def add(self, values):
+        """Ajoute un bloc de valeurs de forme (observations, cellules)"""
+        return self.merge_counts(*self.block_counts(values))
+
+    def merge_counts(self, flat_bins, counts):
+        """Fusionne des comptes creux produits par block_counts"""
+        self.counts.reshape(-1)[flat_bins] += counts.astype(self.counts.dtype)
+        return self
+
+    def merge(self, other):
+        """Fusionne un autre sketch dans celui-ci"""
+        self.counts += other.counts
+        return self
+
+    def _bin_values(self):
+        keys = np.arange(self.min_key, self.max_key + 1)
+        magnitudes = 2 * self.gamma ** keys / (self.gamma + 1)
+        return np.concatenate([-magnitudes[::-1], [0.0], magnitudes])
+
+    def quantiles(self, qs):
+        """Retourne les quantiles estimés, de forme (cellules, quantiles)"""
+        cumulative = np.cumsum(self.counts, axis=1)
+        total = cumulative[:, -1]
+        bin_values = self._bin_values()
+        result = np.full((self.n_cells, len(qs)), np.nan)
+        for j, q in enumerate(qs):
+            rank = q * (total - 1)
+            position = np.argmax(cumulative > rank[:, np.newaxis], axis=1)
+            result[:, j] = np.where(total > 0, bin_values[position], np.nan)
+        return result
+
+
+class MiamiMoments:
+    """Moments fusionnables (effectif, moyenne, M2, min, max) par cellule, selon Chan et al."""
+
+    def __init__(self, n_cells):
+        self.count = np.zeros(n_cells)
+        self.mean = np.zeros(n_cells)
+        self.m2 = np.zeros(n_cells)
+        self.minimum = np.full(n_cells, np.inf)
+        self.maximum = np.full(n_cells, -np.inf)
+
+    @property
+    def nbytes(self):
+        return self.count.nbytes + self.mean.nbytes + self.m2.nbytes + self.minimum.nbytes + self.maximum.nbytes
+
+    @classmethod
+    def from_block(cls, values):
+        """Calcule les moments d'un bloc (observations, cellules) en ignorant les NaN"""
+        moments = cls(values.shape[1])
+        valid = ~np.isnan(values)
+        moments.count = valid.sum(axis=0).astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            moments.mean = np.where(moments.count > 0, np.nansum(values, axis=0) / moments.count, 0.0)
+            moments.m2 = np.nansum((values - moments.mean) ** 2, axis=0)
+        moments.minimum = np.where(moments.count > 0, np.nanmin(np.where(valid, values, np.inf), axis=0), np.inf)
+        moments.maximum = np.where(moments.count > 0, np.nanmax(np.where(valid, values, -np.inf), axis=0), -np.inf)
+        return moments
+
+    def merge(self, other):
+        """Fusionne les moments d'un autre bloc"""
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(count > 0, other.count / count, 0.0)
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * weight
+        self.count = count
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+        return self
+
+    @property
+    def std(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(np.where(self.count > 1, self.m2 / (self.count - 1), np.nan))
+
+
+def _run_ensemble_block(task):
+    """Génère un bloc de trajectoires et retourne ses sketchs (exécuté dans un processus de travail)"""
+    analyzer = MiamiRealEstateAnalyzer(task["area"])
+    if task.get("config"):
+        # Jeu de paramètres : surcharge de la configuration de la zone
+        analyzer.config = {**analyzer.config, **task["config"]}
+    ensemble = analyzer.generate_ensemble(task["n_paths"], seed=task["seed"], hurricanes=task["hurricanes"])
+    ensemble.pop('Year')
+    # Bloc (trajectoires, années × métriques), dans l'ordre des métriques du coordinateur
+    block = np.stack([np.asarray(ensemble[metric], dtype=float) for metric in task["metrics"]], axis=-1)
+    block = block.reshape(task["n_paths"], -1)
+
+    if task.get("spill_file"):
+        spill = np.load(task["spill_file"], mmap_mode='r+')
+        spill[task["start"]:task["start"] + task["n_paths"]] = block.reshape((task["n_paths"],) + spill.shape[1:])
+        spill.flush()
+        del spill
+
+    # Seuls les comptes creux du bloc repartent vers le coordinateur
+    sparse_counts = MiamiQuantileSketch(block.shape[1], **task["sketch"]).block_counts(block)
+    moments = MiamiMoments.from_block(block)
+    return task["area_index"], task.get("key"), sparse_counts, moments
+
+
+class MiamiEnsembleSummary:
+    """Statistiques d'ensemble réduites par (zone, année, métrique)"""
+
+    def __init__(self, areas, years, metrics, quantiles, moments, quantile_values, spill_files=None):
+        self.areas = list(areas)
+        self.years = np.asarray(years)
+        self.metrics = list(metrics)
+        self.quantiles = list(quantiles)
+        shape = (len(self.areas), len(self.years), len(self.metrics))
+        self.count = np.stack([m.count for m in moments]).reshape(shape)
+        self.mean = np.stack([m.mean for m in moments]).reshape(shape)
+        self.std = np.stack([m.std for m in moments]).reshape(shape)
+        self.minimum = np.stack([m.minimum for m in moments]).reshape(shape)
+        self.maximum = np.stack([m.maximum for m in moments]).reshape(shape)
+        self.quantile_values = np.stack(quantile_values).reshape(shape + (len(self.quantiles),))
+        self.spill_files = spill_files or {}
+        self.stop_reason = None
+        self.completed_paths = self.count.max(axis=(1, 2)).astype(int).tolist()
+
+    def to_frame(self):
+        """Retourne les statistiques au format long (zone, année, métrique)"""
+        index = pd.MultiIndex.from_product([pd.CategoricalIndex(self.areas), self.years, self.metrics],
+                                           names=['Area', 'Year', 'Metric'])
+        data = {'Count': self.count.reshape(-1), 'Mean': self.mean.reshape(-1), 'Std': self.std.reshape(-1),
+                'Min': self.minimum.reshape(-1), 'Max': self.maximum.reshape(-1)}
+        for k, q in enumerate(self.quantiles):
+            data[f'P{q * 100:g}'] = self.quantile_values[..., k].reshape(-1)
+        return pd.DataFrame(data, index=index)
+
+
+class MiamiChunkedEnsembleRunner:
+    """Exécution hors mémoire d'ensembles : blocs de trajectoires, pool de processus et réductions fusionnables
+
+    Les graines dépendent de (seed, taille de bloc) : à budget et nombre de processus égaux, les résultats
+    sont reproductibles ; block_size peut être fixé explicitement pour les rendre indépendants des deux.
+    """
+
+    # Octets par valeur générée, en comptant les temporaires de generate_ensemble et des sketchs
+    BYTES_PER_VALUE = 8 * 6
+
+    def __init__(self, areas, n_paths, memory_budget_mb=512, workers=None, seed=None, hurricanes=None,
+                 spill_dir=None, quantiles=(0.05, 0.5, 0.95), relative_accuracy=0.01, block_size=None):
+        self.areas = list(areas)
+        self.n_paths = int(n_paths)
+        self.memory_budget = memory_budget_mb * 1024 ** 2
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.hurricanes = hurricanes
+        self.spill_dir = spill_dir
+        self.quantiles = list(quantiles)
+        self.sketch_params = {"relative_accuracy": relative_accuracy}
+        self.spill_files = {}
+
+        # Petit tirage de référence : années et liste des métriques
+        probe = MiamiRealEstateAnalyzer(self.areas[0]).generate_ensemble(1, seed=0, hurricanes=hurricanes)
+        self.years = probe.pop('Year')
+        self.metrics = list(probe)
+        self.n_cells = len(self.years) * len(self.metrics)
+        self.block_size = min(int(block_size), self.n_paths) if block_size else self._block_size()
+
+    def _block_size(self):
+        """Taille de bloc (trajectoires) compatible avec le budget mémoire"""
+        sketch_bytes = len(self.areas) * MiamiQuantileSketch(self.n_cells, **self.sketch_params).nbytes
+        # Moments fusionnés par zone, plus au plus un bloc arrivé en avance par processus
+        sketch_bytes += (len(self.areas) + self.workers) * MiamiMoments(self.n_cells).nbytes
+        # Le coordinateur tient un sketch par zone ; chaque processus un bloc et ses temporaires
+        per_worker = (self.memory_budget - sketch_bytes) / self.workers
+        block_size = int(per_worker // (self.n_cells * self.BYTES_PER_VALUE))
+        if block_size < 1:
+            minimum = sketch_bytes + self.workers * self.n_cells * self.BYTES_PER_VALUE
+            raise ValueError(f"Memory budget too small: at least {minimum / 1024 ** 2:.0f} MB needed "
+                             f"for {len(self.areas)} areas and {self.workers} workers")
+        return min(block_size, self.n_paths)
+
+    def _tasks(self):
+        """Découpe chaque zone en blocs de trajectoires avec des graines indépendantes et reproductibles"""
+        area_seeds = np.random.SeedSequence(self.seed).spawn(len(self.areas))
+        for a, area in enumerate(self.areas):
+            starts = range(0, self.n_paths, self.block_size)
+            block_seeds = area_seeds[a].spawn(len(starts))
+            for b, start in enumerate(starts):
+                yield {
+                    "area": area,
+                    "area_index": a,
+                    "key": (a, b),
+                    "start": start,
+                    "n_paths": min(self.block_size, self.n_paths - start),
+                    "seed": block_seeds[b].generate_state(4),
+                    "hurricanes": self.hurricanes,
+                    "metrics": self.metrics,
+                    "sketch": self.sketch_params,
+                    "spill_file": self.spill_files.get(area),
+                }
+
+    def _prepare_spill(self):
+        """Crée les fichiers mappés en mémoire (trajectoires, années, métriques) recevant les tirages bruts"""
+        self.spill_files = {}
+        if not self.spill_dir:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        for area in self.areas:
+            path = os.path.join(self.spill_dir, f'{area.replace(" ", "_").lower()}_ensemble.npy')
+            np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                      shape=(self.n_paths, len(self.years), len(self.metrics))).flush()
+            self.spill_files[area] = path
+
+    def run(self, progress=None):
+        """Exécute l'ensemble bloc par bloc et retourne les statistiques réduites
+
+        Avec un MiamiProgress, l'avancement est émis par bloc ; en cas d'annulation ou de budget dépassé,
+        les blocs en cours sont terminés et réduits, et le résumé porte sur les trajectoires achevées.
+        """
+        from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+        self._prepare_spill()
+        sketches = [MiamiQuantileSketch(self.n_cells, **self.sketch_params) for _ in self.areas]
+        # Fusion des moments dans l'ordre des blocs, au fil de l'eau : résultat indépendant de l'ordre
+        # d'achèvement ; seuls les blocs arrivés en avance (au plus un par bloc en vol) sont conservés
+        area_moments = [MiamiMoments(self.n_cells) for _ in self.areas]
+        next_block = [0] * len(self.areas)
+        early = {}
+        completed = []
+        if progress is not None:
+            progress.start(total=self.n_paths * len(self.areas), unit='paths', label='ensemble')
+
+        def reduce(task, result):
+            area_index, key, sparse_counts, block_moments = result
+            sketches[area_index].merge_counts(*sparse_counts)
+            early[key] = block_moments
+            while (area_index, next_block[area_index]) in early:
+                area_moments[area_index].merge(early.pop((area_index, next_block[area_index])))
+                next_block[area_index] += 1
+            completed.append({k: task[k] for k in ("area", "area_index", "key", "start", "n_paths")})
+            if progress is not None:
+                progress.update(task["n_paths"])
+
+        def stopping():
+            return progress is not None and progress.should_stop()
+
+        tasks = self._tasks()
+        if self.workers == 1:
+            for task in tasks:
+                if stopping():
+                    break
+                reduce(task, _run_ensemble_block(task))
+        else:
+            # Nombre de blocs en vol borné pour respecter le budget mémoire
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                pending = {}
+                for task in tasks:
+                    if len(pending) >= self.workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            reduce(pending.pop(future), future.result())
+                    if stopping():
+                        break
+                    pending[pool.submit(_run_ensemble_block, task)] = task
+                for future, task in pending.items():
+                    reduce(task, future.result())
+
+        stop_reason = progress.stop_reason if progress is not None else None
+        if self.spill_dir:
+            self._write_spill_progress(completed, stop_reason)
+        if progress is not None:
+            progress.finish()
+
+        # Blocs achevés au-delà d'une lacune (cas d'un arrêt anticipé) : fusionnés à la suite, dans l'ordre
+        for key in sorted(early):
+            area_moments[key[0]].merge(early.pop(key))
+
+        summary = MiamiEnsembleSummary(self.areas, self.years, self.metrics, self.quantiles, area_moments,
+                                       [sketch.quantiles(self.quantiles) for sketch in sketches],
+                                       self.spill_files)
+        summary.stop_reason = stop_reason
+        summary.completed_paths = [sum(task["n_paths"] for task in completed if task["area_index"] == a)
+                                   for a in range(len(self.areas))]
+        return summary
+
+    def _write_spill_progress(self, completed, stop_reason):
+        """Liste les blocs de trajectoires effectivement écrits dans les fichiers de débordement"""
+        blocks = {area: [] for area in self.areas}
+        for task in sorted(completed, key=lambda task: task["key"]):
+            blocks[task["area"]].append([task["start"], task["n_paths"]])
+        meta = {"complete": stop_reason is None, "stop_reason": stop_reason, "n_paths": self.n_paths,
+                "metrics": self.metrics, "years": np.asarray(self.years).tolist(), "blocks": blocks}
+        path = os.path.join(self.spill_dir, 'progress.json')
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(f'{path}.tmp', path)
+
+
+class MiamiFileWorkQueue:
+    """File de travail sur système de fichiers partagé : réservation par renommage atomique et baux expirables
+
+    Toute classe exposant put, claim, heartbeat, complete, fail, has_result, load_result, failed_units
+    et status peut la remplacer.
+    """
+
+    STATES = ['pending', 'claimed', 'failed', 'results']
+
+    def __init__(self, root, lease_seconds=300, max_attempts=3):
+        self.root = root
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for state in self.STATES:
+            os.makedirs(os.path.join(root, state), exist_ok=True)
+
+    def _path(self, state, unit_id, suffix='.json'):
+        return os.path.join(self.root, state, f'{unit_id}{suffix}')
+
+    @staticmethod
+    def _write_json(path, payload):
+        # Écriture atomique : fichier temporaire puis renommage
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+    def put(self, unit):
+        """Ajoute une unité de travail si elle n'est ni terminée ni déjà en file"""
+        unit_id = unit["unit_id"]
+        if self.has_result(unit_id):
+            return False
+        if any(os.path.exists(self._path(state, unit_id)) for state in ['pending', 'claimed']):
+            return False
+        self._write_json(self._path('pending', unit_id), {**unit, "attempts": unit.get("attempts", 0)})
+        return True
+
+    def _requeue_expired(self):
+        """Remet en file les unités dont le bail a expiré (processus de travail perdu)"""
+        now = time.time()
+        claimed_dir = os.path.join(self.root, 'claimed')
+        for name in os.listdir(claimed_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(claimed_dir, name)
+            try:
+                if now - os.path.getmtime(path) < self.lease_seconds:
+                    continue
+                with open(path, encoding='utf-8') as f:
+                    unit = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            self.fail(unit, "lease expired")
+
+    def claim(self, worker_id):
+        """Réserve la prochaine unité en attente ; retourne None si la file est vide"""
+        self._requeue_expired()
+        pending_dir = os.path.join(self.root, 'pending')
+        for name in sorted(os.listdir(pending_dir)):
+            if not name.endswith('.json'):
+                continue
+            pending = os.path.join(pending_dir, name)
+            claimed = os.path.join(self.root, 'claimed', name)
+            try:
+                # Date du bail posée avant le renommage : une unité tout juste réservée n'apparaît
+                # jamais expirée à un _requeue_expired concurrent
+                os.utime(pending)
+                # Le renommage est atomique : un seul processus obtient l'unité
+                os.rename(pending, claimed)
+            except FileNotFoundError:
+                continue
+            with open(claimed, encoding='utf-8') as f:
+                unit = json.load(f)
+            unit["worker"] = worker_id
+            return unit
+        return None
+
+    def heartbeat(self, unit):
+        """Prolonge le bail d'une unité en cours"""
+        try:
+            os.utime(self._path('claimed', unit["unit_id"]))
+        except FileNotFoundError:
+            pass
+
+    def result_file(self, unit_id):
+        return self._path('results', unit_id, '.npz')
+
+    def has_result(self, unit_id):
+        """Vrai si le résultat de l'unité a été publié"""
+        return os.path.exists(self.result_file(unit_id))
+
+    def load_result(self, unit_id):
+        """Tableaux publiés par complete() pour une unité"""
+        with np.load(self.result_file(unit_id)) as result:
+            return {name: result[name] for name in result.files}
+
+    def failed_units(self):
+        """Identifiants des unités classées en échec (max_attempts atteint)"""
+        failed_dir = os.path.join(self.root, 'failed')
+        return [name[:-len('.json')] for name in os.listdir(failed_dir) if name.endswith('.json')]
+
+    def complete(self, unit, arrays):
+        """Enregistre le résultat d'une unité (écriture atomique, idempotente) et libère le bail"""
+        path = self.result_file(unit["unit_id"])
+        tmp = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+        try:
+            os.remove(self._path('claimed', unit["unit_id"]))
+        except FileNotFoundError:
+            pass
+
+    def fail(self, unit, error):
+        """Remet l'unité en file, ou la classe en échec après max_attempts tentatives"""
+        unit_id = unit["unit_id"]
+        unit = {**unit, "attempts": unit.get("attempts", 0) + 1, "error": str(error)}
+        state = 'failed' if unit["attempts"] >= self.max_attempts else 'pending'
+        self._write_json(self._path(state, unit_id), unit)
+        try:
+            os.remove(self._path('claimed', unit_id))
+        except FileNotFoundError:
+            pass
+
+    def status(self):
+        """Nombre d'unités par état"""
+        return {state: sum(1 for name in os.listdir(os.path.join(self.root, state))
+                           if name.endswith('.json') or name.endswith('.npz'))
+                for state in self.STATES}
+
+
+class MiamiShardCoordinator:
+    """Découpe les ensembles en unités (zone, jeu de paramètres, bloc) et fusionne leurs résultats
+
+    Un jeu de paramètres est un dict : "config" surcharge la configuration de la zone,
+    "hurricane_rate" active MiamiHurricaneModel avec ce taux annuel.
+    """
+
+    def __init__(self, queue, areas, n_paths, param_sets=None, block_size=1000, seed=0,
+                 quantiles=(0.05, 0.5, 0.95), relative_accuracy=0.01):
+        self.queue = queue
+        self.areas = list(areas)
+        self.param_sets = list(param_sets) if param_sets else [{}]
+        self.n_paths = int(n_paths)
+        self.block_size = int(block_size)
+        self.seed = seed
+        self.quantiles = list(quantiles)
+        self.relative_accuracy = relative_accuracy
+
+    def units(self):
+        """Énumère les unités de travail ; graines dérivées de (seed, zone, bloc)
+
+        Les jeux de paramètres partagent les mêmes graines (nombres aléatoires communs), et ces graines
+        sont celles de MiamiChunkedEnsembleRunner pour la même taille de bloc.
+        """
+        for a, area in enumerate(self.areas):
+            for k, params in enumerate(self.param_sets):
+                for b, start in enumerate(range(0, self.n_paths, self.block_size)):
+                    seed = np.random.SeedSequence(self.seed, spawn_key=(a, b))
+                    yield {
+                        "unit_id": f'{a:04d}-{k:04d}-{b:06d}',
+                        "area": area,
+                        "area_index": a,
+                        "param_index": k,
+                        "params": params,
+                        "start": start,
+                        "n_paths": min(self.block_size, self.n_paths - start),
+                        "seed": seed.generate_state(4).tolist(),
+                        "relative_accuracy": self.relative_accuracy,
+                    }
+
+    def submit(self):
+        """Publie toutes les unités non terminées dans la file"""
+        submitted = sum(1 for unit in self.units() if self.queue.put(unit))
+        print(f"📤 {submitted} work units submitted")
+        return submitted
+
+    def monitor(self, progress=None, poll_interval=1.0):
+        """Suit l'avancement des unités jusqu'à leur achèvement ; retourne False si le suivi a été arrêté
+
+        Les résultats déjà publiés restent dans la file : merge() pourra être appelé une fois la file vidée.
+        Lève RuntimeError (avec les identifiants) si toutes les unités restantes sont en échec.
+        """
+        progress = progress or MiamiProgress()
+        unit_ids = [unit["unit_id"] for unit in self.units()]
+        progress.start(total=len(unit_ids), unit='units', label='shards')
+        while True:
+            finished = sum(1 for unit_id in unit_ids if self.queue.has_result(unit_id))
+            failed = sorted(set(self.queue.failed_units()).intersection(unit_ids))
+            progress.update(finished - progress.done)
+            if finished + len(failed) >= len(unit_ids) and failed:
+                progress.stop_reason = 'failed units'
+                progress.finish()
+                raise RuntimeError(f"{len(failed)} work units failed permanently: "
+                                   f"{', '.join(failed)}")
+            if finished == len(unit_ids) or progress.should_stop():
+                return progress.finish()
+            time.sleep(poll_interval)
+
+    def merge(self):
+        """Fusionne les résultats dans l'ordre des unités : un MiamiEnsembleSummary par jeu de paramètres"""
+        units = list(self.units())
+        missing = [unit["unit_id"] for unit in units if not self.queue.has_result(unit["unit_id"])]
+        if missing:
+            raise RuntimeError(f"{len(missing)} work units have no result yet (first: {missing[0]})")
+
+        summaries = []
+        for k in range(len(self.param_sets)):
+            years, metrics = _shard_layout(self.areas[0], self.param_sets[k])
+            n_cells = len(years) * len(metrics)
+            area_moments, area_quantiles = [], []
+            for a in range(len(self.areas)):
+                sketch = MiamiQuantileSketch(n_cells, relative_accuracy=self.relative_accuracy)
+                merged = MiamiMoments(n_cells)
+                for unit in units:
+                    if unit["area_index"] != a or unit["param_index"] != k:
+                        continue
+                    result = self.queue.load_result(unit["unit_id"])
+                    sketch.merge_counts(result["flat_bins"], result["bin_counts"])
+                    moments = MiamiMoments(n_cells)
+                    for field in ['count', 'mean', 'm2', 'minimum', 'maximum']:
+                        setattr(moments, field, result[field])
+                    merged.merge(moments)
+                area_moments.append(merged)
+                area_quantiles.append(sketch.quantiles(self.quantiles))
+            summaries.append(MiamiEnsembleSummary(self.areas, years, metrics, self.quantiles,
+                                                  area_moments, area_quantiles))
+        return summaries
+
+
+def _shard_layout(area, params):
+    """Années et métriques produites pour un jeu de paramètres"""
+    analyzer = MiamiRealEstateAnalyzer(area)
+    analyzer.config = {**analyzer.config, **params.get("config", {})}
+    hurricanes = MiamiHurricaneModel(params["hurricane_rate"]) if "hurricane_rate" in params else None
+    probe = analyzer.generate_ensemble(1, seed=0, hurricanes=hurricanes)
+    years = probe.pop('Year')
+    return years, list(probe)
+
+
+def _keep_lease(queue, unit, interval):
+    """Prolonge le bail d'une unité toutes les interval secondes tant qu'elle s'exécute ; retourne l'arrêt"""
+    import threading
+
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            queue.heartbeat(unit)
+
+    threading.Thread(target=beat, name=f'lease-{unit["unit_id"]}', daemon=True).start()
+    return stop
+
+
+def run_shard_worker(queue, worker_id=None, max_units=None, idle_timeout=0.0, poll_interval=1.0, progress=None,
+                     heartbeat_interval=None):
+    """Boucle d'un processus de travail : réserve, exécute et publie des unités jusqu'à épuisement de la file
+
+    Le bail de l'unité en cours est prolongé toutes les heartbeat_interval secondes (par défaut un tiers
+    de queue.lease_seconds), pour qu'une unité plus longue que son bail ne soit pas relancée ailleurs.
+    Avec un MiamiProgress, l'unité en cours est terminée et publiée avant tout arrêt demandé.
+    """
+    import socket
+
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    heartbeat_interval = heartbeat_interval or getattr(queue, 'lease_seconds', 300) / 3
+    if progress is not None:
+        progress.start(total=max_units, unit='units', label=f'worker {worker_id}')
+    done = 0
+    idle_since = time.time()
+    while max_units is None or done < max_units:
+        if progress is not None and progress.should_stop():
+            break
+        unit = queue.claim(worker_id)
+        if unit is None:
+            if time.time() - idle_since >= idle_timeout:
+                break
+            time.sleep(poll_interval)
+            continue
+        lease = _keep_lease(queue, unit, heartbeat_interval)
+        try:
+            params = unit["params"]
+            years, metrics = _shard_layout(unit["area"], params)
+            hurricanes = MiamiHurricaneModel(params["hurricane_rate"]) if "hurricane_rate" in params else None
+            _, _, (flat_bins, bin_counts), moments = _run_ensemble_block({
+                "area": unit["area"],
+                "area_index": unit["area_index"],
+                "config": params.get("config"),
+                "n_paths": unit["n_paths"],
+                "seed": np.array(unit["seed"], dtype=np.uint32),
+                "hurricanes": hurricanes,
+                "metrics": metrics,
+                "sketch": {"relative_accuracy": unit["relative_accuracy"]},
+            })
+            queue.complete(unit, {"flat_bins": flat_bins, "bin_counts": bin_counts, "count": moments.count,
+                                  "mean": moments.mean, "m2": moments.m2, "minimum": moments.minimum,
+                                  "maximum": moments.maximum})
+            done += 1
+            idle_since = time.time()
+            if progress is not None:
+                progress.update()
+        except Exception as error:
+            queue.fail(unit, error)
+        finally:
+            lease.set()
+    if progress is not None:
+        progress.finish()
+    return done
+
+
+class MiamiEngineEquivalence:
+    """Compare le moteur de référence (boucles annuelles _simulate_*) et un moteur rapide sous le même bruit
+
+    fast_engine(analyzer, n_paths, seed) doit retourner un dict {métrique: tableau (trajectoires, années)},
+    comme generate_ensemble (moteur rapide par défaut).
+    """
+
+    def __init__(self, area, fast_engine=None, atol=1e-6, rtol=1e-9, alpha=0.01):
+        self.area = area
+        self.fast_engine = fast_engine or (lambda analyzer, n_paths, seed:
+                                           analyzer.generate_ensemble(n_paths, seed=seed))
+        self.atol = atol
+        self.rtol = rtol
+        self.alpha = alpha
+
+    def _legacy(self, seed):
+        """Une trajectoire du moteur de référence, graine globale fixée comme dans main()"""
+        import contextlib
+        import io
+
+        analyzer = MiamiRealEstateAnalyzer(self.area)
+        np.random.seed(seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return analyzer.generate_financial_data()
+
+    def _fast(self, n_paths, seed):
+        ensemble = dict(self.fast_engine(MiamiRealEstateAnalyzer(self.area), n_paths, seed))
+        ensemble.pop('Year', None)
+        return {metric: np.asarray(values, dtype=float).reshape(n_paths, -1) for metric, values in ensemble.items()}
+
+    def exact(self, seed=0):
+        """Écarts maximaux par métrique pour une trajectoire de même graine"""
+        start = time.perf_counter()
+        legacy = self._legacy(seed)
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        fast = self._fast(1, seed)
+        fast_time = time.perf_counter() - start
+
+        rows = []
+        for metric in legacy.columns.drop('Year'):
+            expected = legacy[metric].to_numpy(dtype=float)
+            actual = fast[metric][0] if metric in fast else np.full_like(expected, np.nan)
+            nan_mismatch = int((np.isnan(expected) != np.isnan(actual)).sum())
+            both = ~np.isnan(expected) & ~np.isnan(actual)
+            diff = np.abs(expected - actual)[both]
+            scale = np.abs(expected)[both]
+            max_diff = diff.max() if diff.size else 0.0
+            rows.append({
+                'Metric': metric,
+                'Max_Abs_Diff': max_diff,
+                'Max_Rel_Diff': (diff / np.maximum(scale, np.finfo(float).tiny)).max() if diff.size else 0.0,
+                'NaN_Mismatch': nan_mismatch,
+                'Equal': metric in fast and nan_mismatch == 0
+                         and bool(np.all(diff <= self.atol + self.rtol * scale)),
+            })
+        report = pd.DataFrame(rows)
+        report.attrs.update(legacy_seconds=legacy_time, fast_seconds=fast_time)
+        return report
+
+    def statistical(self, n_paths=200, seed=0):
+        """Équivalence en loi sur des ensembles : test KS à deux échantillons par (métrique, année)
+
+        Les trajectoires de référence utilisent les graines seed, seed + 1, ... ; l'ensemble rapide sa propre
+        graine : seules les distributions sont comparées. Seuil alpha corrigé de Bonferroni sur les années.
+        """
+        from scipy.stats import ks_2samp
+
+        start = time.perf_counter()
+        runs = [self._legacy(seed + p) for p in range(n_paths)]
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        fast = self._fast(n_paths, seed)
+        fast_time = time.perf_counter() - start
+
+        rows = []
+        for metric in runs[0].columns.drop('Year'):
+            if metric not in fast:
+                rows.append({'Metric': metric, 'Equivalent': False})
+                continue
+            legacy = np.stack([run[metric].to_numpy(dtype=float) for run in runs])
+            statistics, p_values = [], []
+            for year in range(legacy.shape[1]):
+                x = legacy[:, year][~np.isnan(legacy[:, year])]
+                y = fast[metric][:, year][~np.isnan(fast[metric][:, year])]
+                if len(x) == 0 or len(y) == 0:
+                    continue
+                if np.ptp(x) == 0 and np.ptp(y) == 0:
+                    # Année déterministe : égalité exacte attendue
+                    statistics.append(0.0 if np.isclose(x[0], y[0]) else 1.0)
+                    p_values.append(1.0 if np.isclose(x[0], y[0]) else 0.0)
+                    continue
+                result = ks_2samp(x, y)
+                statistics.append(result.statistic)
+                p_values.append(result.pvalue)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean_gap = np.nanmax(np.abs(np.nanmean(legacy, axis=0) - np.nanmean(fast[metric], axis=0))
+                                     / np.nanstd(legacy, axis=0))
+            min_p = min(p_values) if p_values else 1.0
+            rows.append({
+                'Metric': metric,
+                'Max_KS': max(statistics) if statistics else 0.0,
+                'Min_P_Value': min_p,
+                'Max_Mean_Gap_Std': mean_gap,
+                'Equivalent': min_p >= self.alpha / max(len(p_values), 1),
+            })
+        report = pd.DataFrame(rows)
+        report.attrs.update(legacy_seconds=legacy_time, fast_seconds=fast_time)
+        return report
+
+    def run(self, seed=0, n_paths=200):
+        """Rapport complet : écarts exacts, équivalence statistique et accélération"""
+        exact = self.exact(seed)
+        statistical = self.statistical(n_paths, seed)
+        speedup = statistical.attrs['legacy_seconds'] / max(statistical.attrs['fast_seconds'], 1e-12)
+
+        print(f"⚖️ Engine equivalence - {self.area}")
+        print(f"Exact (seed {seed}): {int(exact['Equal'].sum())}/{len(exact)} metrics identical, "
+              f"max abs diff {exact['Max_Abs_Diff'].max():.3g}")
+        for _, row in exact[~exact['Equal']].iterrows():
+            print(f"⚠️ {row['Metric']}: max diff {row['Max_Abs_Diff']:.3g}, {row['NaN_Mismatch']} NaN mismatches")
+        print(f"Statistical ({n_paths} paths): {int(statistical['Equivalent'].sum())}/{len(statistical)} "
+              f"metrics equivalent at alpha={self.alpha}")
+        for _, row in statistical[~statistical['Equivalent']].iterrows():
+            print(f"⚠️ {row['Metric']}: min p-value {row.get('Min_P_Value', np.nan):.3g}")
+        print(f"Speedup: {speedup:.0f}x ({statistical.attrs['legacy_seconds']:.2f}s → "
+              f"{statistical.attrs['fast_seconds'] * 1000:.1f}ms)")
+
+        return {
+            'exact': exact,
+            'statistical': statistical,
+            'speedup': speedup,
+            'equivalent': bool(exact['Equal'].all() and statistical['Equivalent'].all()),
+        }
+
+
+class MiamiSharedPanel:
+    """Panel placé en mémoire partagée ; un descripteur léger (nom, dtypes, formes, décalages) suffit pour
+    l'attacher en lecture seule dans un autre processus, sans sérialisation ni copie des métriques
+
+    Les métriques attachées sont des vues sans copie ; construire un DataFrame (area_frame) copie en revanche
+    les valeurs sélectionnées, ce qui reste petit pour une zone et une trajectoire (années × métriques).
+    """
+
+    ALIGNMENT = 64
+
+    def __init__(self, shm, descriptor, panel, owner=False):
+        self.shm = shm
+        self.descriptor = descriptor
+        self.panel = panel
+        self.owner = owner
+
+    @staticmethod
+    def _views(buffer, descriptor):
+        columns = {}
+        for metric, layout in descriptor["columns"].items():
+            view = np.ndarray(tuple(layout["shape"]), dtype=np.dtype(layout["dtype"]), buffer=buffer,
+                              offset=layout["offset"])
+            view.flags.writeable = False
+            columns[metric] = view
+        return MiamiPanelStore(descriptor["areas"], descriptor["years"], columns)
+
+    @classmethod
+    def publish(cls, panel):
+        """Copie une fois les métriques du panel dans un segment de mémoire partagée"""
+        from multiprocessing import shared_memory
+
+        layout, offset = {}, 0
+        for metric, values in panel.columns.items():
+            offset = -(-offset // cls.ALIGNMENT) * cls.ALIGNMENT
+            layout[metric] = {"dtype": values.dtype.str, "shape": list(values.shape), "offset": offset}
+            offset += values.nbytes
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for metric, values in panel.columns.items():
+            target = np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf, offset=layout[metric]["offset"])
+            target[...] = values
+        descriptor = {"name": shm.name, "areas": panel.areas, "years": panel.years.tolist(), "columns": layout}
+        return cls(shm, descriptor, cls._views(shm.buf, descriptor), owner=True)
+
+    @classmethod
+    def attach(cls, descriptor):
+        """Attache un panel publié : les métriques sont des vues en lecture seule du segment partagé"""
+        from multiprocessing import shared_memory
+
+        shm = shared_memory.SharedMemory(name=descriptor["name"])
+        return cls(shm, descriptor, cls._views(shm.buf, descriptor))
+
+    def close(self):
+        """Détache le segment ; le propriétaire le libère"""
+        self.panel = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # Des vues sont encore référencées ailleurs : le segment sera détaché à leur libération
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _run_shared_stage(task):
+    """Exécute une étape (graphiques, insights, export) sur une zone d'un panel partagé"""
+    import contextlib
+    import io
+
+    area, stage = task["area"], task["stage"]
+    # Attachement limité à la tâche : seul le DataFrame de la zone (petite copie) survit au détachement
+    with MiamiSharedPanel.attach(task["descriptor"]) as shared:
+        df = shared.panel.area_frame(area, task["path"])
+    analyzer = MiamiRealEstateAnalyzer(area)
+    prefix = os.path.join(task["output_dir"], f'{area.replace(" ", "_").lower()}_florida')
+
+    if stage == 'plot':
+        plt.switch_backend('Agg')
+        output_file = f'{prefix}_analysis.png'
+        analyzer.create_financial_analysis(df, output_file=output_file, show=False, insights=False)
+        return output_file
+    if stage == 'insights':
+        with contextlib.redirect_stdout(io.StringIO()) as text:
+            analyzer._generate_miami_insights(df)
+        return text.getvalue()
+    if stage == 'export':
+        output_file = f'{prefix}_data_{analyzer.start_year}_{analyzer.end_year}.csv'
+        (compact_frame(df) if task.get("compact") else df).to_csv(output_file, index=False)
+        return output_file
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def run_shared_stages(panel, stages=('plot', 'insights', 'export'), path=0, output_dir='.', workers=None,
+                      compact=False):
+    """Publie le panel en mémoire partagée et répartit les étapes par zone entre des processus
+
+    compact=True écrit les exports CSV en types compacts.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    os.makedirs(output_dir, exist_ok=True)
+    with MiamiSharedPanel.publish(panel) as shared:
+        tasks = [{"descriptor": shared.descriptor, "area": area, "stage": stage, "path": path,
+                  "output_dir": output_dir, "compact": compact}
+                 for area in panel.areas for stage in stages]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = dict(zip([(task["area"], task["stage"]) for task in tasks],
+                               executor.map(_run_shared_stage, tasks)))
+
+    for area in panel.areas:
+        if 'insights' in stages:
+            print(results[(area, 'insights')])
+    return results
+
+
+def _render_report_section(task):
+    """Rend la section HTML d'une zone : graphiques réduits en PNG base64 et tableau des insights"""
+    import base64
+    import contextlib
+    import html
+    import io
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    area, df = task["area"], task["df"]
+    analyzer = MiamiRealEstateAnalyzer(area)
+
+    with plt.style.context('seaborn-v0_8'):
+        fig = Figure(figsize=(16, 22), dpi=task["dpi"])
+        FigureCanvasAgg(fig)
+        for k, method in enumerate(MiamiHtmlReport.PANELS, 1):
+            getattr(analyzer, method)(df, fig.add_subplot(5, 2, k))
+        # Marges fixes : tight_layout coûterait autant que le rendu lui-même
+        fig.subplots_adjust(left=0.06, right=0.93, bottom=0.03, top=0.98, hspace=0.35, wspace=0.35)
+        image = io.BytesIO()
+        fig.savefig(image, format='png', dpi=task["dpi"])
+
+    with contextlib.redirect_stdout(io.StringIO()) as text:
+        analyzer._generate_miami_insights(df)
+    stats = analyzer._compute_insight_statistics(df)
+    rows = ''.join(f'<tr><th>{html.escape(label)}</th><td>{html.escape(str(value))}</td></tr>'
+                   for label, value in MiamiHtmlReport.format_statistics(stats))
+    encoded = base64.b64encode(image.getvalue()).decode('ascii')
+
+    return (f'<section id="{task["anchor"]}">\n'
+            f'<h2>{html.escape(area)}</h2>\n'
+            f'<table class="stats">{rows}</table>\n'
+            f'<img alt="{html.escape(area)} charts" src="data:image/png;base64,{encoded}">\n'
+            f'<details><summary>Insights</summary><pre>{html.escape(text.getvalue())}</pre></details>\n'
+            f'</section>\n')
+
+
+class MiamiHtmlReport:
+    """Rapport HTML autonome de toutes les zones : sections rendues en parallèle et mises en cache"""
+
+    PANELS = ['_plot_real_estate_prices', '_plot_condo_beachfront_market', '_plot_real_estate_activity',
+              '_plot_tourism_international_revenue', '_plot_rental_market', '_plot_miami_investments',
+              '_plot_demography_international', '_plot_climate_resilience', '_plot_construction_development',
+              '_plot_sectorial_investments']
+    # À incrémenter quand le rendu d'une section change (invalide le cache)
+    RENDER_VERSION = 1
+    STYLE = ('body{font-family:sans-serif;margin:0;display:flex}'
+             'nav{position:sticky;top:0;height:100vh;overflow:auto;padding:1em;background:#f4f6f8;min-width:14em}'
+             'main{padding:1em 2em;max-width:1100px}img{max-width:100%}'
+             'table{border-collapse:collapse;margin:1em 0}th,td{border:1px solid #ddd;padding:4px 8px;text-align:left}'
+             'td{text-align:right}')
+
+    def __init__(self, output_file='miami_florida_report.html', cache_dir=None, dpi=50, workers=None,
+                 max_cache_files=64):
+        self.output_file = output_file
+        self.cache_dir = cache_dir or f'{os.path.splitext(output_file)[0]}_cache'
+        self.dpi = dpi
+        self.workers = workers
+        self.max_cache_files = max_cache_files
+
+    @staticmethod
+    def format_statistics(stats):
+        """Libellés et valeurs formatées des statistiques clés"""
+        return [
+            ('Average median home price', f"${stats['avg_home_price']:,.0f}"),
+            ('Average median income', f"${stats['avg_income']:,.0f}"),
+            ('Average rent', f"${stats['avg_rent']:.0f}"),
+            ('Home price growth', f"{stats['price_growth']:.1f}%"),
+            ('Condo price growth', f"{stats['condo_growth']:.1f}%"),
+            ('Current international buyers', f"{stats['current_international']:.1f}%"),
+            ('Tourism tax revenue', f"${stats['tourism_revenue']:.1f}M"),
+            ('Price-to-income ratio', f"{stats['current_ratio']:.1f} ({stats['affordability_status']})"),
+            ('Rental vacancy rate', f"{stats['current_vacancy']:.1f}%"),
+            ('Home insurance premium', f"${stats['insurance_cost']:,.0f} ({stats['insurance_to_income']:.1f}% of income)"),
+        ]
+
+    def section_key(self, area, df):
+        """Empreinte du contenu d'une section : zone, données, résolution et version du rendu"""
+        import hashlib
+
+        digest = hashlib.sha1(f'{area}|{self.dpi}|{self.RENDER_VERSION}|{list(df.columns)}'.encode('utf-8'))
+        # Colonnes numériques seulement : une colonne Area catégorielle (compact_frame) n'est pas convertible
+        digest.update(np.ascontiguousarray(df.select_dtypes('number').to_numpy(dtype=float)).tobytes())
+        return digest.hexdigest()[:16]
+
+    def build(self, frames=None, panel=None, path=0):
+        """Assemble le rapport ; seules les sections dont les données ont changé sont rendues à nouveau"""
+        import html
+        from concurrent.futures import ProcessPoolExecutor
+
+        if frames is None:
+            if panel is None:
+                raise ValueError("Provide area frames or a panel")
+            frames = {area: panel.area_frame(area, path) for area in panel.areas}
+        if not frames:
+            raise ValueError("No areas to report: frames is empty")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        sections, tasks = {}, []
+        for area, df in frames.items():
+            anchor = area.replace(" ", "_").lower()
+            cache_file = os.path.join(self.cache_dir, f'{anchor}-{self.section_key(area, df)}.html')
+            if os.path.exists(cache_file):
+                with open(cache_file, encoding='utf-8') as f:
+                    sections[area] = f.read()
+                # Date de dernier usage, pour l'élagage du cache
+                os.utime(cache_file)
+            else:
+                tasks.append({"area": area, "df": df, "dpi": self.dpi, "anchor": anchor, "cache_file": cache_file})
+
+        if tasks:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                for task, section in zip(tasks, executor.map(_render_report_section, tasks)):
+                    with open(task["cache_file"], 'w', encoding='utf-8') as f:
+                        f.write(section)
+                    sections[task["area"]] = section
+        self.prune_cache(keep=len(frames))
+
+        # Tableau comparatif des zones en tête du rapport
+        summary_rows = []
+        for area, df in frames.items():
+            stats = MiamiRealEstateAnalyzer(area)._compute_insight_statistics(df)
+            cells = ''.join(f'<td>{html.escape(value)}</td>' for _, value in self.format_statistics(stats)[:8])
+            summary_rows.append(f'<tr><th><a href="#{area.replace(" ", "_").lower()}">{html.escape(area)}</a></th>'
+                                f'{cells}</tr>')
+        header = ''.join(f'<th>{html.escape(label)}</th>' for label, _ in self.format_statistics(stats)[:8])
+        nav = ''.join(f'<li><a href="#{area.replace(" ", "_").lower()}">{html.escape(area)}</a></li>'
+                      for area in frames)
+
+        document = (f'<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8">'
+                    f'<title>Miami/Florida Real Estate Report</title><style>{self.STYLE}</style></head>\n'
+                    f'<body><nav><h3>Areas</h3><ul>{nav}</ul></nav><main>\n'
+                    f'<h1>🌴 Miami/Florida Real Estate Report</h1>\n'
+                    f'<table class="summary"><tr><th>Area</th>{header}</tr>{"".join(summary_rows)}</table>\n'
+                    + ''.join(sections[area] for area in frames) +
+                    '</main></body></html>\n')
+        with open(self.output_file, 'w', encoding='utf-8') as f:
+            f.write(document)
+
+        print(f"📄 Report saved: {self.output_file} ({len(tasks)}/{len(frames)} sections rendered, "
+              f"{len(frames) - len(tasks)} from cache)")
+        return self.output_file
+
+    def prune_cache(self, keep=0):
+        """Supprime les sections les moins récemment utilisées au-delà de max_cache_files (au moins keep conservées)"""
+        if self.max_cache_files is None or not os.path.isdir(self.cache_dir):
+            return 0
+        files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith('.html')]
+        files.sort(key=os.path.getmtime, reverse=True)
+        stale = files[max(self.max_cache_files, keep):]
+        for path in stale:
+            os.remove(path)
+        return len(stale)
+
+
+class MiamiRegimeAnalytics:
+    """Corrélations décalées entre métriques et détection de ruptures, en lots sur (zone, trajectoire, métrique)
+
+    Les corrélations portent sur les taux de croissance annuels ; au décalage L > 0, la métrique en ligne
+    précède celle en colonne de L années. Les ruptures sont cherchées par segmentation binaire d'un ajustement
+    linéaire par morceaux (log des niveaux pour les séries positives), comme les régimes de MiamiScenario.
+    """
+
+    def __init__(self, max_lag=3, n_breaks=4, min_segment=3, penalty=None, min_gain=0.01, chunk_paths=256):
+        self.max_lag = max_lag
+        self.n_breaks = n_breaks
+        self.min_segment = min_segment
+        self.penalty = penalty
+        self.min_gain = min_gain
+        self.chunk_paths = chunk_paths
+
+    def _cache_key(self, panel):
+        import hashlib
+
+        digest = hashlib.sha1(json.dumps([self.max_lag, self.n_breaks, self.min_segment, self.penalty, self.min_gain,
+                                          panel.areas, panel.years.tolist(), panel.metrics]).encode('utf-8'))
+        for values in panel.columns.values():
+            digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()[:16]
+
+    def _series(self, panel, a, paths):
+        """Bloc (trajectoires, années, métriques) d'une zone, en flottants"""
+        return np.stack([np.asarray(panel.columns[metric][a, :, paths], dtype=float).T
+                         for metric in panel.metrics], axis=-1)
+
+    def _lagged_correlations(self, block):
+        """Corrélations (décalages, trajectoires, métriques, métriques) des taux de croissance"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            growth = np.diff(block, axis=1) / np.abs(block[:, :-1])
+        growth[~np.isfinite(growth)] = np.nan
+        n_growth = growth.shape[1]
+        lags = range(-self.max_lag, self.max_lag + 1)
+        result = np.full((len(lags), block.shape[0], block.shape[2], block.shape[2]), np.nan)
+        for k, lag in enumerate(lags):
+            if n_growth - abs(lag) < 3:
+                continue
+            x = growth[:, :n_growth - lag] if lag >= 0 else growth[:, -lag:]
+            y = growth[:, lag:] if lag >= 0 else growth[:, :n_growth + lag]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                x = (x - x.mean(axis=1, keepdims=True)) / x.std(axis=1, keepdims=True)
+                y = (y - y.mean(axis=1, keepdims=True)) / y.std(axis=1, keepdims=True)
+            result[k] = np.einsum('ptm,ptn->pmn', x, y, optimize=True) / x.shape[1]
+        return result
+
+    def _change_points(self, series):
+        """Ruptures (séries, n_breaks) en indices d'années (-1 si aucune), par segmentation binaire vectorisée"""
+        n_series, n_years = series.shape
+        t = np.arange(n_years, dtype=float)
+        zero = np.zeros((n_series, 1))
+        # Sommes préfixées : chaque segment [s, e) s'ajuste en O(1)
+        p1 = np.concatenate([[0.0], np.cumsum(t)])
+        p2 = np.concatenate([[0.0], np.cumsum(t * t)])
+        py = np.concatenate([zero, np.cumsum(series, axis=1)], axis=1)
+        pty = np.concatenate([zero, np.cumsum(series * t, axis=1)], axis=1)
+        pyy = np.concatenate([zero, np.cumsum(series * series, axis=1)], axis=1)
+
+        def sse(s, e):
+            take = lambda prefix: np.take_along_axis(prefix, e, axis=1) - np.take_along_axis(prefix, s, axis=1)
+            n = (e - s).astype(float)
+            st, stt = p1[e] - p1[s], p2[e] - p2[s]
+            sy, sty, syy = take(py), take(pty), take(pyy)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                level = syy - sy ** 2 / n
+                slope = (sty - st * sy / n) ** 2 / (stt - st ** 2 / n)
+            return np.where(n >= 3, level - np.nan_to_num(slope), np.where(n > 0, level, 0.0))
+
+        penalty = self.penalty if self.penalty is not None else 4 * np.log(n_years)
+        index = np.broadcast_to(np.arange(n_years + 1), (n_series, n_years + 1))
+        is_break = np.zeros((n_series, n_years + 1), dtype=bool)
+        is_break[:, [0, n_years]] = True
+        current = sse(np.zeros((n_series, 1), dtype=int), np.full((n_series, 1), n_years))[:, 0]
+        # Gain minimal en part de la variance totale : écarte la simple courbure des séries peu bruitées
+        total = pyy[:, -1] - py[:, -1] ** 2 / n_years
+        floor = self.min_gain * total
+        breaks = np.full((n_series, self.n_breaks), -1, dtype=np.int16)
+        candidates = np.broadcast_to(np.arange(1, n_years), (n_series, n_years - 1))
+
+        for round_ in range(self.n_breaks):
+            starts = np.maximum.accumulate(np.where(is_break, index, 0), axis=1)
+            ends = np.minimum.accumulate(np.where(is_break, index, n_years)[:, ::-1], axis=1)[:, ::-1]
+            s = starts[:, 1:n_years]
+            e = ends[:, 2:n_years + 1]
+            gain = sse(s, e) - sse(s, candidates) - sse(candidates, e)
+            valid = ((candidates - s >= self.min_segment) & (e - candidates >= self.min_segment)
+                     & ~is_break[:, 1:n_years] & np.isfinite(gain))
+            gain = np.where(valid, gain, -np.inf)
+            best = np.argmax(gain, axis=1)
+            best_gain = gain[np.arange(n_series), best]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                accept = (np.isfinite(best_gain) & (best_gain > floor)
+                          & (n_years * np.log(current / np.maximum(current - best_gain, 1e-300)) > penalty))
+            rows = np.nonzero(accept)[0]
+            is_break[rows, best[rows] + 1] = True
+            breaks[rows, round_] = best[rows] + 1
+            current = np.where(accept, current - best_gain, current)
+        return breaks
+
+    def compute(self, panel, cache_dir=None):
+        """Corrélations décalées moyennes et ruptures par trajectoire ; mises en cache à côté du panel"""
+        cache_file = None
+        if cache_dir is not None:
+            cache_file = os.path.join(cache_dir, f'regimes-{self._cache_key(panel)}.npz')
+            if os.path.exists(cache_file):
+                with np.load(cache_file) as cached:
+                    return {name: cached[name] for name in cached.files}
+
+        n_areas, n_years, n_paths = panel.shape
+        n_metrics = len(panel.metrics)
+        n_lags = 2 * self.max_lag + 1
+        corr_sum = np.zeros((n_lags, n_areas, n_metrics, n_metrics))
+        corr_sq = np.zeros_like(corr_sum)
+        corr_count = np.zeros_like(corr_sum)
+        breaks = np.full((n_areas, n_paths, n_metrics, self.n_breaks), -1, dtype=np.int16)
+
+        for a in range(n_areas):
+            for start in range(0, n_paths, self.chunk_paths):
+                paths = slice(start, min(start + self.chunk_paths, n_paths))
+                block = self._series(panel, a, paths)
+                corr = self._lagged_correlations(block)
+                finite = np.isfinite(corr)
+                corr_sum[:, a] += np.where(finite, corr, 0).sum(axis=1)
+                corr_sq[:, a] += np.where(finite, corr ** 2, 0).sum(axis=1)
+                corr_count[:, a] += finite.sum(axis=1)
+
+                # Log des niveaux pour les séries strictement positives (ruptures multiplicatives)
+                positive = (block > 0).all(axis=1, keepdims=True)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    signal = np.where(positive, np.log(np.where(block > 0, block, 1.0)), block)
+                signal = np.nan_to_num(signal.transpose(0, 2, 1).reshape(-1, n_years))
+                breaks[a, paths] = self._change_points(signal).reshape(block.shape[0], n_metrics, -1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr_mean = corr_sum / corr_count
+            corr_std = np.sqrt(np.maximum(corr_sq / corr_count - corr_mean ** 2, 0))
+        # Part des trajectoires avec une rupture commençant à chaque année : (zone, métrique, année)
+        onehot = np.zeros((n_areas, n_paths, n_metrics, n_years + 1))
+        np.put_along_axis(onehot, np.where(breaks >= 0, breaks, n_years).astype(np.intp), 1.0, axis=3)
+        result = {
+            "lags": np.arange(-self.max_lag, self.max_lag + 1),
+            "correlation_mean": corr_mean,
+            "correlation_std": corr_std,
+            "breaks": breaks,
+            "break_share": onehot[..., :n_years].mean(axis=1),
+        }
+        if cache_file is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez(cache_file, **result)
+        return result
+
+    def lead_lag(self, panel, result, leader, follower):
+        """Corrélation moyenne par décalage et décalage dominant, par zone"""
+        m, n = panel.metrics.index(leader), panel.metrics.index(follower)
+        corr = result["correlation_mean"][:, :, m, n]
+        table = pd.DataFrame(corr.T, index=pd.Index(panel.areas, name='Area'),
+                             columns=[f'Lag_{lag:+d}' for lag in result["lags"]])
+        best = np.nanargmax(np.abs(np.where(np.isnan(corr), 0, corr)), axis=0)
+        table['Best_Lag'] = result["lags"][best]
+        table['Best_Correlation'] = corr[best, np.arange(len(panel.areas))]
+        return table
+
+    def change_points(self, panel, result, top=3, tolerance=1):
+        """Années de rupture les plus fréquentes par (zone, métrique), comparées aux régimes du scénario de référence"""
+        scenario = MiamiScenario()
+        rows = []
+        for m, metric in enumerate(panel.metrics):
+            # Frontières codées en dur : débuts de régime et de chocs touchant la métrique
+            boundaries = {start for _, start, _, _, _ in scenario.curves.get(metric, []) if start is not None}
+            for event in scenario.events:
+                if metric in event["factors"]:
+                    boundaries.add(event["start"])
+                    if event["end"] is not None:
+                        boundaries.add(event["end"] + 1)
+            boundaries = sorted(year for year in boundaries if panel.years[0] < year <= panel.years[-1])
+
+            for a, area in enumerate(panel.areas):
+                share = result["break_share"][a, m]
+                order = np.argsort(share)[::-1][:top]
+                detected = result["breaks"][a, :, m]
+                years = panel.years[np.where(detected >= 0, detected, 0)]
+                if boundaries:
+                    distance = np.min(np.abs(years[..., np.newaxis] - np.array(boundaries)), axis=-1)
+                    matched = (distance <= tolerance)[detected >= 0].mean() if (detected >= 0).any() else np.nan
+                else:
+                    matched = np.nan
+                row = {'Area': area, 'Metric': metric,
+                       'Breaks_per_Path': (detected >= 0).sum(axis=1).mean(),
+                       'Scenario_Boundaries': boundaries, 'Share_Matched': matched}
+                for k, year_index in enumerate(order, 1):
+                    row[f'Year_{k}'] = panel.years[year_index] if share[year_index] > 0 else np.nan
+                    row[f'Share_{k}'] = share[year_index]
+                rows.append(row)
+        return pd.DataFrame(rows)
+
+
+class MiamiSurrogateEmulator:
+    """Émulateur entraîné (scikit-learn) des sorties clés du simulateur, pour des requêtes instantanées
+
+    Entrées : zone de base, paramètres numériques de configuration et paramètres de scénario.
+    Sorties : moyennes d'ensemble de l'année cible. Le modèle (polynôme de degré 2 + ridge sur les logs)
+    est ensuite évalué en NumPy pur ; il est réentraîné si le code du simulateur change.
+    Les simulations d'entraînement passent par generate_ensemble plutôt que generate_financial_data :
+    les deux moteurs sont identiques au bit près (MiamiEngineEquivalence), et seul le premier accepte
+    un scénario et produit des centaines de trajectoires par appel.
+    """
+
+    AREAS = ["Miami Downtown", "Miami Beach", "Brickell", "Coral Gables", "Fort Lauderdale", "West Palm Beach",
+             "South Florida Region"]
+    # Paramètres de configuration : facteur multiplicatif (min, max) autour de la valeur de la zone
+    CONFIG_PARAMETERS = {
+        "population_base": (0.5, 2.0),
+        "budget_base": (0.5, 2.0),
+        "prix_m2_base": (0.5, 2.0),
+    }
+    SHARE_PARAMETERS = ["condo_share", "beachfront_share"]
+    # Paramètres de scénario : (courbe, régime, champ, min, max)
+    SCENARIO_PARAMETERS = {
+        "crisis_price_level": ('Median_Home_Price', 'crisis', 'level', 0.40, 0.90),
+        "recovery_price_slope": ('Median_Home_Price', 'recovery', 'slope', 0.04, 0.20),
+        "post_covid_price_slope": ('Median_Home_Price', 'post_covid', 'slope', 0.00, 0.20),
+        "post_covid_income_slope": ('Median_Income', 'post_covid', 'slope', 0.00, 0.08),
+    }
+    TARGETS = ['Median_Home_Price', 'Budget_Balance', 'Price_to_Income']
+
+    def __init__(self, n_samples=1500, n_paths=32, validation_share=0.2, seed=0, alpha=1e-3):
+        self.n_samples = n_samples
+        self.n_paths = n_paths
+        self.validation_share = validation_share
+        self.seed = seed
+        self.alpha = alpha
+        self.fingerprint = None
+        self.error_bounds = None
+
+    @classmethod
+    def source_fingerprint(cls):
+        """Empreinte du code qui détermine les sorties émulées"""
+        import hashlib
+        import inspect
+
+        sources = [inspect.getsource(obj) for obj in [
+            MiamiRealEstateAnalyzer._get_area_config, MiamiRealEstateAnalyzer.generate_ensemble,
+            MiamiRealEstateAnalyzer._add_florida_trends_vectorized, MiamiScenario, MiamiInsuranceModel, cls]]
+        return hashlib.sha1('\n'.join(sources).encode('utf-8')).hexdigest()
+
+    def _features(self, area_index, config, params):
+        """Vecteur d'entrée : zone (indicatrices), logs des paramètres positifs, parts et scénario"""
+        onehot = np.zeros(len(self.AREAS))
+        onehot[area_index] = 1.0
+        numeric = [np.log(config[name]) for name in self.CONFIG_PARAMETERS]
+        shares = [config[name] for name in self.SHARE_PARAMETERS]
+        scenario = [params[name] for name in self.SCENARIO_PARAMETERS]
+        return np.concatenate([onehot, numeric, shares, scenario])
+
+    def _scenario(self, params):
+        scenario = MiamiScenario()
+        for name, (curve, regime, field, _, _) in self.SCENARIO_PARAMETERS.items():
+            scenario = scenario.with_segment(curve, regime, **{field: params[name]})
+        return scenario
+
+    def _defaults(self):
+        scenario = MiamiScenario()
+        defaults = {}
+        for name, (curve, regime, field, _, _) in self.SCENARIO_PARAMETERS.items():
+            segment = next(seg for seg in scenario.curves[curve] if seg[0] == regime)
+            defaults[name] = segment[3] if field == 'level' else segment[4]
+        return defaults
+
+    def simulate(self, area, config_overrides=None, params=None, seed=None):
+        """Moyennes d'ensemble des sorties cibles pour une requête (référence de l'émulateur)"""
+        analyzer = MiamiRealEstateAnalyzer(area)
+        analyzer.config = {**analyzer.config, **(config_overrides or {})}
+        params = {**self._defaults(), **(params or {})}
+        ensemble = analyzer.generate_ensemble(self.n_paths, seed=seed, scenario=self._scenario(params))
+        price, income = ensemble['Median_Home_Price'][:, -1], ensemble['Median_Income'][:, -1]
+        outputs = {'Median_Home_Price': price, 'Budget_Balance': ensemble['Budget_Balance'][:, -1],
+                   'Price_to_Income': price / income}
+        return {target: float(np.mean(outputs[target])) for target in self.TARGETS}, \
+               {target: float(np.std(outputs[target]) / np.sqrt(self.n_paths)) for target in self.TARGETS}
+
+    def _sample(self, rng):
+        area_index = int(rng.integers(len(self.AREAS)))
+        base = MiamiRealEstateAnalyzer(self.AREAS[area_index]).config
+        config = {name: base[name] * rng.uniform(*bounds) for name, bounds in self.CONFIG_PARAMETERS.items()}
+        config.update({name: rng.uniform(0.0, 1.0) for name in self.SHARE_PARAMETERS})
+        params = {name: rng.uniform(low, high) for name, (_, _, _, low, high) in self.SCENARIO_PARAMETERS.items()}
+        return area_index, config, params
+
+    def train(self):
+        """Échantillonne le simulateur, entraîne le modèle et mesure l'erreur sur un jeu de validation"""
+        from sklearn.linear_model import Ridge
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+        rng = np.random.default_rng(self.seed)
+        seeds = np.random.SeedSequence(self.seed).spawn(self.n_samples)
+        X, Y, noise = [], [], []
+        for k in range(self.n_samples):
+            area_index, config, params = self._sample(rng)
+            means, errors = self.simulate(self.AREAS[area_index], config, params, seed=seeds[k].generate_state(4))
+            X.append(self._features(area_index, config, params))
+            Y.append([means[target] for target in self.TARGETS])
+            noise.append([errors[target] / means[target] for target in self.TARGETS])
+        X, Y = np.array(X), np.log(np.array(Y))
+
+        n_train = int(len(X) * (1 - self.validation_share))
+        model = make_pipeline(StandardScaler(), PolynomialFeatures(degree=2), Ridge(alpha=self.alpha))
+        model.fit(X[:n_train], Y[:n_train])
+
+        # Extraction des coefficients en forme quadratique : constante + z·linéaire + produits croisés
+        scaler, poly, ridge = model.named_steps.values()
+        self.mean_, self.scale_ = scaler.mean_, scaler.scale_
+        degree = poly.powers_.sum(axis=1)
+        self.constant_ = ridge.intercept_ + ridge.coef_[:, degree == 0].sum(axis=1)
+        self.linear_ = np.zeros((len(self.TARGETS), X.shape[1]))
+        self.linear_[:, np.argmax(poly.powers_[degree == 1], axis=1)] = ridge.coef_[:, degree == 1]
+        pairs = [np.repeat(np.arange(X.shape[1]), row) for row in poly.powers_[degree == 2]]
+        self.pairs_ = np.array(pairs).T
+        self.quadratic_ = ridge.coef_[:, degree == 2]
+        self.base_configs = {area: MiamiRealEstateAnalyzer(area).config for area in self.AREAS}
+        self.defaults = self._defaults()
+
+        relative = np.abs(np.exp(self.predict_features(X[n_train:]) - Y[n_train:]) - 1)
+        self.error_bounds = pd.DataFrame({
+            'Mean_Relative_Error': relative.mean(axis=0),
+            'P95_Relative_Error': np.quantile(relative, 0.95, axis=0),
+            'Max_Relative_Error': relative.max(axis=0),
+            # Bruit Monte Carlo des moyennes d'ensemble utilisées comme cibles
+            'Target_MC_Noise': np.array(noise).mean(axis=0),
+        }, index=pd.Index(self.TARGETS, name='Target'))
+        self.fingerprint = self.source_fingerprint()
+        return self
+
+    def predict_features(self, X):
+        """Log des sorties pour des vecteurs d'entrée (n, caractéristiques)"""
+        z = (np.atleast_2d(X) - self.mean_) / self.scale_
+        return z @ self.linear_.T + (z[:, self.pairs_[0]] * z[:, self.pairs_[1]]) @ self.quadratic_.T + self.constant_
+
+    def predict(self, area, config_overrides=None, params=None):
+        """Sorties émulées pour une zone, des surcharges de configuration et des paramètres de scénario"""
+        config = {**self.base_configs[area], **(config_overrides or {})}
+        params = {**self.defaults, **(params or {})}
+        values = np.exp(self.predict_features(self._features(self.AREAS.index(area), config, params))[0])
+        return dict(zip(self.TARGETS, values))
+
+    def save(self, path):
+        import pickle
+
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load_or_train(cls, path='miami_surrogate.pkl', **kwargs):
+        """Charge l'émulateur sauvegardé, ou le réentraîne si le code du simulateur a changé"""
+        import pickle
+
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                emulator = pickle.load(f)
+            if emulator.fingerprint == cls.source_fingerprint():
+                return emulator
+            print("🔁 Simulator code changed: retraining surrogate emulator...")
+        emulator = cls(**kwargs).train()
+        emulator.save(path)
+        print(f"🤖 Surrogate emulator trained on {emulator.n_samples} simulations: {path}")
+        return emulator
+
+
+def main(compact=False):
+    """Fonction principale pour Miami/Floride (compact=True : exports en types compacts)"""
     # Liste des zones de Miami/Floride
     areas = ["Miami Downtown", "Miami Beach", "Brickell", "Coral Gables", 
              "Fort Lauderdale", "West Palm Beach", "South Florida Region"]
@@ -1169,15 +4638,36 @@ def main():
     # Générer les données
     real_estate_data = analyzer.generate_financial_data()
     
-    # Sauvegarder les données
+    # Sauvegarder les données (types compacts sur demande : float32, entiers réduits)
     output_file = f'{selected_area.replace(" ", "_").lower()}_florida_data_2002_2025.csv'
-    real_estate_data.to_csv(output_file, index=False)
-    print(f"💾 Data saved: {output_file}")
+    export_data = compact_frame(real_estate_data) if compact else real_estate_data
+    export_data.to_csv(output_file, index=False)
+    print(f"💾 Data saved: {output_file}" + (" (compact)" if compact else ""))
+    if compact:
+        savings = memory_savings(real_estate_data, export_data)
+        print(f"💾 Memory: {savings['before_bytes'] / 1e3:.1f} KB → {savings['after_bytes'] / 1e3:.1f} KB "
+              f"({savings['ratio']:.1f}× smaller)")
+    
+    # Index d'indicateurs précalculés, sauvegardé à côté des données
+    indicators = MiamiPanelStore.from_frames({selected_area: real_estate_data}).indicators
+    indicators_file = output_file.replace('.csv', '_indicators.csv')
+    indicator_table = indicators.table(selected_area)
+    if compact:
+        indicator_table = indicator_table.astype(np.float32)
+    indicator_table.to_csv(indicators_file)
+    print(f"💾 Indicators saved: {indicators_file}")
     
     # Aperçu des données
     print("\n👀 Data preview:")
     print(real_estate_data[['Year', 'Population', 'Median_Home_Price', 'International_Buyers_Percentage', 'Tourism_Tax_Revenue']].head())
     
+    # Contrôler la cohérence des données
+    validation = MiamiDataValidator().check(real_estate_data)
+    failed = validation[~validation['Passed']]
+    print(f"\n🔎 Data validation: {len(validation) - len(failed)}/{len(validation)} checks passed")
+    for _, row in failed.iterrows():
+        print(f"⚠️ {row['Check']} ({row['Column']}): {row['Violations']}/{row['Rows']} rows")
+    
     # Créer l'analyse
     print("\n📈 Creating Miami/Florida real estate analysis...")
     analyzer.create_financial_analysis(real_estate_data)
@@ -1187,4 +4677,4 @@ def main():
     print("🏠 Data: Demographics, real estate market, tourism, international buyers, climate resilience")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(compact="--compact" in sys.argv[1:])
\ No newline at end of file